@@ -0,0 +1,255 @@
+import argparse
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import tornado.ioloop
+import tornado.web
+from dotenv import load_dotenv
+
+import auth
+import gemini_utils
+import jobs
+import pantry
+import sessions
+
+# Headless JSON API over the same model helpers and user store as the
+# Streamlit app. Model calls and storage access are blocking, so they run on
+# a thread pool while the event loop keeps serving other requests.
+API_WORKERS = int(os.getenv("API_WORKERS", "32"))
+
+_executor = ThreadPoolExecutor(max_workers=API_WORKERS, thread_name_prefix="api")
+
+
+def run_blocking(func, *args, **kwargs):
+    """Run a blocking call on the API thread pool"""
+    return tornado.ioloop.IOLoop.current().run_in_executor(_executor, lambda: func(*args, **kwargs))
+
+
+def issue_token(email, password):
+    """Check credentials against the user store and return a signed session token"""
+    user = auth.get_user(email)
+    if user is None or auth.hash_password(password) != user["password_hash"]:
+        return None
+    return sessions.create_session(email, user["name"])
+
+
+def token_user(token):
+    """Email of the user a session token belongs to, or None"""
+    session = sessions.validate(token)
+    return session["email"] if session else None
+
+
+# Same limits as the web UI's servings input
+MIN_SERVINGS = 1
+MAX_SERVINGS = 20
+
+
+def generate_and_save(user_email, preferences, dietary_restrictions, servings, additional_info):
+    generate_kwargs = {
+        "preferences": preferences,
+        "dietary_restrictions": dietary_restrictions,
+        "servings": servings,
+        "additional_info": additional_info
+    }
+    recipe_data = gemini_utils.generate_recipe(**generate_kwargs)
+    jobs.save_result(user_email, preferences, recipe_data, generate_kwargs)
+    return recipe_data
+
+
+def generate_batch_and_save(user_email, requests):
+    recipes = gemini_utils.generate_recipes_batch(requests)
+    for request, recipe_data in zip(requests, recipes):
+        jobs.save_result(user_email, request["preferences"], recipe_data, request)
+    return recipes
+
+
+def modify_and_save(user_email, recipe_hash, change):
+    if not auth.has_recipe(user_email, recipe_hash):
+        return None
+    return jobs.modify_and_save(user_email, recipe_hash, change)
+
+
+class JSONHandler(tornado.web.RequestHandler):
+    """Base handler with JSON bodies, JSON errors and bearer-token auth"""
+
+    def set_default_headers(self):
+        self.set_header("Content-Type", "application/json")
+
+    def write_error(self, status_code, **kwargs):
+        self.finish(json.dumps({"error": self._reason}))
+
+    def json_body(self):
+        try:
+            body = json.loads(self.request.body or b"{}")
+        except ValueError:
+            raise tornado.web.HTTPError(400, reason="Request body must be JSON")
+        if not isinstance(body, dict):
+            raise tornado.web.HTTPError(400, reason="Request body must be a JSON object")
+        return body
+
+    async def prepare(self):
+        self.user_email = None
+        header = self.request.headers.get("Authorization", "")
+        if header.startswith("Bearer "):
+            self.user_email = await run_blocking(token_user, header[len("Bearer "):])
+
+    def generation_args(self, body, require_preferences=True):
+        """Validated recipe request fields from a body, with defaults; 400 on bad types"""
+        preferences = body.get("preferences", "")
+        if not isinstance(preferences, str) or (require_preferences and not preferences.strip()):
+            raise tornado.web.HTTPError(400, reason="preferences must be a non-empty string")
+        dietary_restrictions = body.get("dietary_restrictions", [])
+        if not isinstance(dietary_restrictions, list) or \
+                not all(isinstance(item, str) for item in dietary_restrictions):
+            raise tornado.web.HTTPError(400, reason="dietary_restrictions must be a list of strings")
+        servings = body.get("servings", 2)
+        if not isinstance(servings, int) or isinstance(servings, bool) or \
+                not MIN_SERVINGS <= servings <= MAX_SERVINGS:
+            raise tornado.web.HTTPError(400, reason=f"servings must be an integer from {MIN_SERVINGS} to {MAX_SERVINGS}")
+        additional_info = body.get("additional_info", "")
+        if not isinstance(additional_info, str):
+            raise tornado.web.HTTPError(400, reason="additional_info must be a string")
+        return {
+            "preferences": preferences,
+            "dietary_restrictions": dietary_restrictions,
+            "servings": servings,
+            "additional_info": additional_info
+        }
+
+    def require_user(self):
+        if self.user_email is None:
+            raise tornado.web.HTTPError(401, reason="Missing or invalid token")
+        return self.user_email
+
+    def write_json(self, data, status=200):
+        self.set_status(status)
+        self.finish(json.dumps(data))
+
+
+class HealthHandler(JSONHandler):
+    def get(self):
+        self.write_json({"status": "ok", "model_breaker": gemini_utils.breaker_stats()})
+
+
+class LoginHandler(JSONHandler):
+    async def post(self):
+        body = self.json_body()
+        if not body.get("email") or not body.get("password"):
+            raise tornado.web.HTTPError(400, reason="Please enter both email and password")
+        token = await run_blocking(issue_token, body["email"], body["password"])
+        if token is None:
+            raise tornado.web.HTTPError(401, reason="Incorrect email or password")
+        self.write_json({"token": token})
+
+
+class LogoutHandler(JSONHandler):
+    async def post(self):
+        self.require_user()
+        await run_blocking(sessions.revoke, self.request.headers["Authorization"][len("Bearer "):])
+        self.write_json({"status": "logged out"})
+
+
+class RecipesHandler(JSONHandler):
+    async def get(self):
+        user_email = self.require_user()
+        entries = await run_blocking(auth.get_user_recipes, user_email)
+        recipes = [
+            {
+                "prompt": entry["prompt"],
+                "created_at": entry["created_at"],
+                "recipe_hash": entry.get("recipe_hash"),
+                "parent_hash": entry.get("parent_hash"),
+                "recipe_data": entry["recipe"].to_dict()
+            }
+            for entry in entries
+        ]
+        self.write_json({"recipes": recipes})
+
+    async def post(self):
+        user_email = self.require_user()
+        args = self.generation_args(self.json_body())
+        recipe_data = await run_blocking(
+            generate_and_save,
+            user_email,
+            args["preferences"],
+            args["dietary_restrictions"],
+            args["servings"],
+            args["additional_info"]
+        )
+        self.write_json(recipe_data, status=502 if "error" in recipe_data else 200)
+
+
+class RecipeBatchHandler(JSONHandler):
+    async def post(self):
+        user_email = self.require_user()
+        body = self.json_body()
+        requests = body.get("requests")
+        if not isinstance(requests, list) or not requests or \
+                not all(isinstance(request, dict) for request in requests):
+            raise tornado.web.HTTPError(400, reason="requests must be a non-empty list of objects")
+        if len(requests) > gemini_utils.MAX_BATCH_SIZE:
+            raise tornado.web.HTTPError(400, reason=f"At most {gemini_utils.MAX_BATCH_SIZE} requests per batch")
+        requests = [self.generation_args(request) for request in requests]
+        recipes = await run_blocking(generate_batch_and_save, user_email, requests)
+        self.write_json({"recipes": recipes})
+
+
+class RecipeModifyHandler(JSONHandler):
+    async def post(self):
+        user_email = self.require_user()
+        body = self.json_body()
+        if not body.get("recipe_hash") or not body.get("change"):
+            raise tornado.web.HTTPError(400, reason="recipe_hash and change are required")
+        recipe_data = await run_blocking(modify_and_save, user_email, body["recipe_hash"], body["change"])
+        if recipe_data is None:
+            raise tornado.web.HTTPError(404, reason="Recipe not found in your history")
+        self.write_json(recipe_data, status=502 if "error" in recipe_data else 200)
+
+
+class RecipeIdeasHandler(JSONHandler):
+    async def post(self):
+        self.require_user()
+        body = self.json_body()
+        ingredients = body.get("ingredients")
+        if not ingredients:
+            raise tornado.web.HTTPError(400, reason="Please enter some ingredients!")
+        if not isinstance(ingredients, list) or not all(isinstance(item, str) for item in ingredients):
+            raise tornado.web.HTTPError(400, reason="ingredients must be a list of strings")
+        args = self.generation_args(body, require_preferences=False)
+        recipe_ideas = await run_blocking(
+            gemini_utils.generate_recipes_from_ingredients,
+            ingredients=pantry.canonical_names(ingredients),
+            preferences=args["preferences"],
+            dietary_restrictions=args["dietary_restrictions"],
+            servings=args["servings"]
+        )
+        if isinstance(recipe_ideas, dict) and "error" in recipe_ideas:
+            self.write_json(recipe_ideas, status=502)
+        else:
+            self.write_json({"recipe_ideas": recipe_ideas})
+
+
+def make_app():
+    return tornado.web.Application([
+        (r"/api/health", HealthHandler),
+        (r"/api/login", LoginHandler),
+        (r"/api/logout", LogoutHandler),
+        (r"/api/recipes", RecipesHandler),
+        (r"/api/recipes/batch", RecipeBatchHandler),
+        (r"/api/recipes/modify", RecipeModifyHandler),
+        (r"/api/recipe-ideas", RecipeIdeasHandler),
+    ])
+
+
+if __name__ == "__main__":
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="AI Cooking Assistant JSON API")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    args = parser.parse_args()
+
+    app = make_app()
+    app.listen(args.port)
+    print(f"API listening on port {args.port}")
+    tornado.ioloop.IOLoop.current().start()
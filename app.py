@@ -3,7 +3,14 @@ import os
 from dotenv import load_dotenv
 import gemini_utils
 import auth
+import jobs
+import models
+import pantry
+import recipe_store
+import render
 import json
+import time
+from datetime import datetime
 import pandas as pd
 
 # Load environment variables
@@ -48,40 +55,36 @@ st.markdown("""
 # Setup authentication
 auth.setup_auth()
 
-def display_recipe(recipe_data):
-    """Display a recipe in a nice format"""
-    if "error" in recipe_data:
-        st.error(recipe_data["error"])
-        return
+# Seconds between status checks while a generation job is running
+JOB_POLL_INTERVAL = 0.5
+
+def display_recipe(recipe, recipe_hash=None):
+    """Display a recipe (a Recipe or a recipe dict) in a nice format"""
+    if isinstance(recipe, dict):
+        if "error" in recipe:
+            st.error(recipe["error"])
+            return
+        if recipe.get("stale"):
+            st.warning(recipe["notice"])
+        try:
+            recipe = models.Recipe.from_dict(recipe)
+        except ValueError:
+            st.error("Failed to generate recipe. Please try again.")
+            return
+    
+    # Pre-rendered blocks, memoized by content hash across reruns
+    header, details, nutrition_info, body = render.render_recipe(recipe, recipe_hash)
     
-    st.markdown(f"<h2>{recipe_data['title']}</h2>", unsafe_allow_html=True)
-    st.markdown(f"<p><i>{recipe_data['description']}</i></p>", unsafe_allow_html=True)
+    st.markdown(header, unsafe_allow_html=True)
     
     col1, col2 = st.columns(2)
     with col1:
-        st.markdown("### Details")
-        st.markdown(f"**Prep Time:** {recipe_data['prep_time']}")
-        st.markdown(f"**Cook Time:** {recipe_data['cook_time']}")
-        st.markdown(f"**Servings:** {recipe_data['servings']}")
+        st.markdown(details)
     
     with col2:
-        st.markdown("### Nutrition Information")
-        st.markdown(f"**Calories:** {recipe_data['nutrition_info']['calories']}")
-        st.markdown(f"**Protein:** {recipe_data['nutrition_info']['protein']}")
-        st.markdown(f"**Carbs:** {recipe_data['nutrition_info']['carbs']}")
-        st.markdown(f"**Fat:** {recipe_data['nutrition_info']['fat']}")
+        st.markdown(nutrition_info)
     
-    st.markdown("### Ingredients")
-    for ingredient in recipe_data['ingredients']:
-        st.markdown(f"- {ingredient}")
-    
-    st.markdown("### Instructions")
-    for i, step in enumerate(recipe_data['instructions'], 1):
-        st.markdown(f"{i}. {step}")
-    
-    st.markdown("### Shopping List")
-    for item in recipe_data['shopping_list']:
-        st.markdown(f"- {item}")
+    st.markdown(body)
 
 def display_recipe_ideas(recipe_ideas):
     """Display multiple recipe ideas in cards"""
@@ -89,6 +92,9 @@ def display_recipe_ideas(recipe_ideas):
         st.error(recipe_ideas["error"])
         return
     
+    if st.button("Generate All Full Recipes"):
+        submit_batch_generation(recipe_ideas)
+    
     for recipe in recipe_ideas:
         with st.expander(f"**{recipe['title']}** - {recipe['difficulty']} ({recipe['estimated_time']})"):
             st.markdown(f"**Description:** {recipe['description']}")
@@ -102,21 +108,162 @@ def display_recipe_ideas(recipe_ideas):
                 st.markdown(f"- {ingredient}")
             
             if st.button(f"Generate Full Recipe for {recipe['title']}", key=f"full_recipe_{recipe['title']}"):
-                with st.spinner("Generating full recipe..."):
-                    preferences = f"Recipe for {recipe['title']}: {recipe['description']}"
-                    full_recipe = gemini_utils.generate_recipe(
-                        preferences=preferences,
-                        dietary_restrictions=st.session_state.get('dietary_restrictions', []),
-                        servings=st.session_state.get('servings', 2)
-                    )
-                    # Save to user history
-                    auth.save_recipe(
-                        st.session_state['username'],
-                        f"Full recipe for {recipe['title']}",
-                        full_recipe
-                    )
-                    # Display full recipe
-                    display_recipe(full_recipe)
+                preferences = f"Recipe for {recipe['title']}: {recipe['description']}"
+                submit_generation(
+                    f"Full recipe for {recipe['title']}",
+                    preferences=preferences,
+                    dietary_restrictions=st.session_state.get('dietary_restrictions', []),
+                    servings=st.session_state.get('servings', 2)
+                )
+
+def submit_batch_generation(recipe_ideas):
+    """Queue one batched generation of full recipes for all recipe ideas"""
+    prompts = [f"Full recipe for {recipe['title']}" for recipe in recipe_ideas]
+    requests = [
+        {
+            "preferences": f"Recipe for {recipe['title']}: {recipe['description']}",
+            "dietary_restrictions": st.session_state.get('dietary_restrictions', []),
+            "servings": st.session_state.get('servings', 2)
+        }
+        for recipe in recipe_ideas
+    ]
+    try:
+        st.session_state['generation_job'] = jobs.submit_batch_generation(
+            st.session_state['username'],
+            prompts,
+            requests
+        )
+    except jobs.QueueFullError as e:
+        st.error(str(e))
+
+def submit_generation(prompt, **generate_kwargs):
+    """Queue a recipe generation in the background for the current user"""
+    try:
+        st.session_state['generation_job'] = jobs.submit_generation(
+            st.session_state['username'],
+            prompt,
+            **generate_kwargs
+        )
+    except jobs.QueueFullError as e:
+        st.error(str(e))
+
+def submit_modification(recipe_hash, change):
+    """Queue a change to a stored recipe for the current user"""
+    try:
+        st.session_state['generation_job'] = jobs.submit_modification(
+            st.session_state['username'],
+            recipe_hash,
+            change
+        )
+    except jobs.QueueFullError as e:
+        st.error(str(e))
+
+def display_modify_form(recipe_hash, key):
+    """Let the user ask for a small change to a saved recipe; True once a change is queued"""
+    change = st.text_input("Modify this recipe", key=f"modify_{key}",
+                           placeholder="E.g., Make it spicier, Swap chicken for tofu, etc.")
+    if st.button("Apply Change", key=f"modify_button_{key}"):
+        if not change:
+            st.warning("Please describe the change you'd like!")
+        else:
+            submit_modification(recipe_hash, change)
+            return True
+    return False
+
+def display_job_modify_form(recipe_data, key):
+    # Only recipes that were saved to history can be modified
+    if "error" not in recipe_data and not recipe_data.get("stale"):
+        return display_modify_form(recipe_store.recipe_hash(recipe_data), key)
+    return False
+
+def wait_for_job(job_id, queued_message, running_message):
+    """Show a job's progress until it finishes and return its final snapshot"""
+    # Poll in place; every status update is a point where Streamlit can stop
+    # this run, so navigating away never waits on the model call
+    job = jobs.get_job(job_id)
+    status = st.empty()
+    while job is not None and job["status"] in ("queued", "running"):
+        if job["status"] == "queued":
+            status.info(queued_message.format(jobs.get_queue().position(job_id)))
+        else:
+            status.info(running_message)
+        time.sleep(JOB_POLL_INTERVAL)
+        job = jobs.get_job(job_id)
+    status.empty()
+    return job
+
+def submit_recipe_ideas(**generate_kwargs):
+    """Queue a recipe-ideas generation in the background for the current user"""
+    try:
+        st.session_state['recipe_ideas_job'] = jobs.submit_recipe_ideas(**generate_kwargs)
+    except jobs.QueueFullError as e:
+        st.error(str(e))
+
+def collect_recipe_ideas_job():
+    """Wait for a queued recipe-ideas job and keep its ideas in session state"""
+    job_id = st.session_state.get('recipe_ideas_job')
+    if not job_id:
+        return
+    
+    job = wait_for_job(
+        job_id,
+        "Your recipe ideas are queued ({} ahead of you).",
+        "Finding recipe ideas based on your ingredients..."
+    )
+    del st.session_state['recipe_ideas_job']
+    if job is None or job["status"] == "failed":
+        st.error("Failed to generate recipe ideas. Please try again.")
+        return
+    # Kept in session state so the full-recipe buttons survive reruns
+    st.session_state['recipe_ideas'] = job["result"]
+
+def display_generation_job():
+    """Show the status or result of the current user's generation job"""
+    job_id = st.session_state.get('generation_job')
+    if not job_id:
+        return
+    
+    job = jobs.get_job(job_id)
+    if job is None:
+        # Expired or lost on a restart; the recipe is still in history if it finished
+        del st.session_state['generation_job']
+        return
+    
+    st.markdown("---")
+    job = wait_for_job(
+        job_id,
+        "Your recipe is queued ({} ahead of you). You can leave this page; it will be saved to your Recipe History.",
+        "Generating your personalized recipe... You can leave this page; it will be saved to your Recipe History."
+    )
+    
+    if job is None or job["status"] == "failed":
+        st.error("Failed to generate recipe. Please try again.")
+        return
+    
+    if isinstance(job["result"], list):
+        st.markdown("## Your Full Recipes")
+        for idx, recipe_data in enumerate(job["result"]):
+            with st.expander(recipe_data.get("title", "Recipe")):
+                display_recipe(recipe_data)
+                if display_job_modify_form(recipe_data, f"job_{job_id}_{idx}"):
+                    # Follow the modification job just queued
+                    display_generation_job()
+                    return
+        return
+    
+    st.markdown("## Your Personalized Recipe")
+    display_recipe(job["result"])
+    if display_job_modify_form(job["result"], f"job_{job_id}"):
+        display_generation_job()
+
+def history_label(recipe_entry):
+    """Recipe title and creation time for a history entry"""
+    # Convert ISO format string to readable date if possible
+    try:
+        created_at = datetime.fromisoformat(recipe_entry['created_at']).strftime("%Y-%m-%d %H:%M")
+    except (KeyError, TypeError, ValueError):
+        created_at = recipe_entry.get('created_at', 'Unknown date')
+    return f"{recipe_entry['recipe'].title} - {created_at}"
 
 def main():
     if st.session_state['authentication_status'] is not True:
@@ -131,6 +278,19 @@ def main():
         # Logout button
         auth.logout()
         
+        # Generation capacity
+        queue_stats = jobs.stats()
+        st.sidebar.caption(
+            f"Generation queue: {queue_stats['queued']} waiting, "
+            f"{queue_stats['running']}/{queue_stats['workers']} workers busy"
+        )
+        breaker_stats = gemini_utils.breaker_stats()
+        if breaker_stats['state'] != "closed":
+            st.sidebar.caption(
+                f"Recipe service: {breaker_stats['state'].replace('_', ' ')}, "
+                f"{queue_stats['pending_refreshes']} recipes waiting to be refreshed"
+            )
+        
         if page == "Generate New Recipe":
             st.title("Generate a New Recipe")
             
@@ -158,25 +318,15 @@ def main():
                 if not preferences:
                     st.warning("Please enter what you'd like to cook!")
                 else:
-                    with st.spinner("Generating your personalized recipe..."):
-                        recipe_data = gemini_utils.generate_recipe(
-                            preferences=preferences,
-                            dietary_restrictions=dietary_restrictions,
-                            servings=servings,
-                            additional_info=additional_info
-                        )
-                        
-                        # Save to user history
-                        auth.save_recipe(
-                            st.session_state['username'],
-                            preferences,
-                            recipe_data
-                        )
-                        
-                        # Display the recipe
-                        st.markdown("---")
-                        st.markdown("## Your Personalized Recipe")
-                        display_recipe(recipe_data)
+                    submit_generation(
+                        preferences,
+                        preferences=preferences,
+                        dietary_restrictions=dietary_restrictions,
+                        servings=servings,
+                        additional_info=additional_info
+                    )
+            
+            display_generation_job()
         
         elif page == "Cook with Ingredients":
             st.title("Cook with Available Ingredients")
@@ -211,44 +361,67 @@ def main():
                 if not ingredients_input.strip():
                     st.warning("Please enter some ingredients!")
                 else:
-                    ingredients_list = [ing.strip() for ing in ingredients_input.split('\n') if ing.strip()]
+                    # Map free text to canonical ingredients so equivalent pantries give the same prompt
+                    ingredients_list = pantry.canonical_names(ingredients_input.split('\n'))
+                    st.caption("Using: " + ", ".join(ingredients_list))
                     
-                    with st.spinner("Finding recipe ideas based on your ingredients..."):
-                        recipe_ideas = gemini_utils.generate_recipes_from_ingredients(
-                            ingredients=ingredients_list,
-                            preferences=preferences,
-                            dietary_restrictions=dietary_restrictions,
-                            servings=servings
-                        )
-                        
-                        # Display recipe ideas
-                        st.markdown("---")
-                        st.markdown("## Recipe Ideas From Your Ingredients")
-                        display_recipe_ideas(recipe_ideas)
+                    submit_recipe_ideas(
+                        ingredients=ingredients_list,
+                        preferences=preferences,
+                        dietary_restrictions=dietary_restrictions,
+                        servings=servings
+                    )
+            
+            collect_recipe_ideas_job()
+            
+            if st.session_state.get('recipe_ideas'):
+                # Display recipe ideas
+                st.markdown("---")
+                st.markdown("## Recipe Ideas From Your Ingredients")
+                display_recipe_ideas(st.session_state['recipe_ideas'])
+            
+            display_generation_job()
         
         elif page == "Recipe History":
             st.title("Your Recipe History")
             
+            # Filled in last, so a modification requested below shows up above the list
+            job_area = st.container()
+            
             # Get user recipes
             user_recipes = auth.get_user_recipes(st.session_state['username'])
             
             if not user_recipes:
                 st.info("You haven't generated any recipes yet. Try generating a new recipe!")
             else:
+                labels = [history_label(recipe_entry) for recipe_entry in user_recipes]
+                
+                # One modify form for the whole page, so long histories stay a few elements per recipe
+                modifiable = {}
+                seen_hashes = set()
                 for idx, recipe_entry in enumerate(user_recipes):
-                    recipe_data = recipe_entry['recipe_data']
-                    prompt = recipe_entry['prompt']
-                    
-                    # Convert ISO format string to readable date if possible
-                    try:
-                        from datetime import datetime
-                        created_at = datetime.fromisoformat(recipe_entry['created_at']).strftime("%Y-%m-%d %H:%M")
-                    except:
-                        created_at = recipe_entry.get('created_at', 'Unknown date')
-                    
-                    with st.expander(f"{recipe_data['title']} - {created_at}"):
-                        st.markdown(f"**Original Request:** {prompt}")
-                        display_recipe(recipe_data)
+                    recipe_hash = recipe_entry.get('recipe_hash')
+                    if recipe_hash and recipe_hash not in seen_hashes:
+                        seen_hashes.add(recipe_hash)
+                        label, copy = labels[idx], 1
+                        while label in modifiable:
+                            copy += 1
+                            label = f"{labels[idx]} ({copy})"
+                        modifiable[label] = recipe_hash
+                if modifiable:
+                    selected = st.selectbox("Recipe to modify", options=list(modifiable), key="modify_history_recipe")
+                    display_modify_form(modifiable[selected], "history")
+                
+                for idx, recipe_entry in enumerate(user_recipes):
+                    with st.expander(labels[idx]):
+                        if recipe_entry.get('parent_hash'):
+                            st.markdown(f"**Requested Change:** {recipe_entry['prompt']}")
+                        else:
+                            st.markdown(f"**Original Request:** {recipe_entry['prompt']}")
+                        display_recipe(recipe_entry['recipe'], recipe_entry.get('recipe_hash'))
+            
+            with job_area:
+                display_generation_job()
 
 if __name__ == "__main__":
     main()
@@ -1,32 +1,38 @@
 import streamlit as st
-import json
-import os
 import re
 import hashlib
 from datetime import datetime
+import recipe_store
+import sessions
+import storage
 
-# Create data directory if it doesn't exist
-os.makedirs("data", exist_ok=True)
-os.makedirs("data/recipes", exist_ok=True)
+# Name of the user store in the shared state backend
+USERS = "users"
 
-# Path to users file
-USERS_FILE = "data/users.json"
+# Query parameter holding the signed session token, so refreshes stay logged in
+SESSION_PARAM = "session"
 
 def hash_password(password):
     """Simple password hashing"""
     return hashlib.sha256(password.encode()).hexdigest()
 
 def load_users():
-    """Load users from JSON file"""
-    if os.path.exists(USERS_FILE):
-        with open(USERS_FILE, 'r') as f:
-            return json.load(f)
-    return {}
+    """Load all users from the user store"""
+    return storage.get_backend().hgetall(USERS)
 
 def save_users(users):
-    """Save users to JSON file"""
-    with open(USERS_FILE, 'w') as f:
-        json.dump(users, f, indent=4)
+    """Save users to the user store"""
+    backend = storage.get_backend()
+    for email, user in users.items():
+        backend.hset(USERS, email, user)
+
+def get_user(email):
+    """Load a single user from the user store"""
+    return storage.get_backend().hget(USERS, email)
+
+def add_user(email, user):
+    """Add a user unless the email is already registered"""
+    return storage.get_backend().hsetnx(USERS, email, user)
 
 def setup_auth():
     """Initialize session state variables"""
@@ -36,6 +42,16 @@ def setup_auth():
         st.session_state['username'] = None
     if 'name' not in st.session_state:
         st.session_state['name'] = None
+    
+    # Restore a session after a browser refresh or reconnect
+    if st.session_state['authentication_status'] is not True:
+        token = st.query_params.get(SESSION_PARAM)
+        session = sessions.validate(token) if token else None
+        if session is not None:
+            st.session_state['authentication_status'] = True
+            st.session_state['username'] = session["email"]
+            st.session_state['name'] = session["name"]
+            st.session_state['session_token'] = token
 
 def login_page():
     """Display login and registration forms"""
@@ -54,17 +70,20 @@ def login_page():
                 st.error("Please enter both email and password")
                 return
             
-            users = load_users()
-            if login_email not in users:
+            user = get_user(login_email)
+            if user is None:
                 st.error("User not found")
                 return
             
             # Verify password
             hashed_password = hash_password(login_password)
-            if hashed_password == users[login_email]["password_hash"]:
+            if hashed_password == user["password_hash"]:
                 st.session_state['authentication_status'] = True
                 st.session_state['username'] = login_email
-                st.session_state['name'] = users[login_email]["name"]
+                st.session_state['name'] = user["name"]
+                token = sessions.create_session(login_email, user["name"])
+                st.session_state['session_token'] = token
+                st.query_params[SESSION_PARAM] = token
                 st.success("Login successful!")
                 st.experimental_rerun()
             else:
@@ -94,64 +113,50 @@ def login_page():
                 st.error("Please enter a valid email")
                 return
             
-            # Load existing users
-            users = load_users()
-            
-            # Check if user already exists
-            if reg_email in users:
-                st.error("Email already registered")
-                return
-            
-            # Hash password and save user
+            # Hash password and save user, unless another worker registered it first
             hashed_password = hash_password(reg_password)
-            users[reg_email] = {
+            user = {
                 "name": reg_name,
                 "password_hash": hashed_password,
                 "created_at": datetime.now().isoformat()
             }
             
-            save_users(users)
+            if not add_user(reg_email, user):
+                st.error("Email already registered")
+                return
+            
             st.success("Registration successful! Please login.")
 
 def logout():
     """Handle user logout"""
     if st.sidebar.button("Logout"):
+        token = st.session_state.pop('session_token', None)
+        if token:
+            sessions.revoke(token)
+        if SESSION_PARAM in st.query_params:
+            del st.query_params[SESSION_PARAM]
         st.session_state['authentication_status'] = None
         st.session_state['username'] = None
         st.session_state['name'] = None
         st.experimental_rerun()
 
-def save_recipe(user_email, prompt, recipe_data):
-    """Save generated recipe to user history"""
-    user_dir = f"data/recipes/{user_email.replace('@', '_at_')}"
-    os.makedirs(user_dir, exist_ok=True)
-    
-    # Create a timestamp-based filename
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{user_dir}/{timestamp}.json"
-    
-    recipe_entry = {
-        "prompt": prompt,
-        "recipe_data": recipe_data,
-        "created_at": datetime.now().isoformat()
-    }
-    
-    with open(filename, 'w') as f:
-        json.dump(recipe_entry, f, indent=4)
+def save_recipe(user_email, prompt, recipe_data, parent_hash=None):
+    """Save generated recipe to user history, linked to the recipe it modifies if any"""
+    # Store the recipe body once and keep only a reference in the history entry
+    recipe_hash = recipe_store.put_recipe(recipe_data)
+    entry = recipe_store.make_entry(prompt, recipe_hash, datetime.now().isoformat(), parent_hash)
+    storage.get_backend().rpush(recipe_store.history_name(user_email), entry)
+
+def has_recipe(user_email, recipe_hash):
+    """Whether a recipe is in a user's history"""
+    entries = storage.get_backend().lrange(recipe_store.history_name(user_email))
+    return any(entry.get("recipe_hash") == recipe_hash for entry in entries)
 
 def get_user_recipes(user_email):
-    """Get all recipes for a user"""
-    user_dir = f"data/recipes/{user_email.replace('@', '_at_')}"
-    if not os.path.exists(user_dir):
-        return []
-    
-    recipes = []
-    for filename in os.listdir(user_dir):
-        if filename.endswith('.json'):
-            filepath = os.path.join(user_dir, filename)
-            with open(filepath, 'r') as f:
-                recipe_entry = json.load(f)
-                recipes.append(recipe_entry)
+    """Get all recipes for a user, each history entry carrying a Recipe"""
+    entries = storage.get_backend().lrange(recipe_store.history_name(user_email))
+    # Entries for failed generations have no recipe to show
+    recipes = [entry for entry in map(recipe_store.resolve_entry, entries) if entry["recipe"] is not None]
     
     # Sort by created_at (newest first)
     recipes.sort(key=lambda x: x.get('created_at', ''), reverse=True)
@@ -0,0 +1,144 @@
+"""Load benchmark for the JSON API against the local stand-in model.
+
+Starts ``api.py`` in a subprocess with GEMINI_BACKEND=stub and a throwaway
+data directory, then fires concurrent requests at it.
+
+    python -m benchmarks.api_load --requests 500 --concurrency 100 --latency 0.5
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from tornado.httpclient import AsyncHTTPClient, HTTPClientError
+
+from benchmarks.util import latency_summary
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port, data_dir, latency):
+    env = dict(
+        os.environ,
+        GEMINI_BACKEND="stub",
+        STUB_MODEL_LATENCY=str(latency),
+        STATE_BACKEND="file",
+        STATE_URL=data_dir,
+    )
+    return subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "api.py"), f"--port={port}"],
+        cwd=data_dir, env=env, stdout=subprocess.DEVNULL
+    )
+
+
+def register_user(data_dir, email, password):
+    # Register through the same user store the server reads
+    sys.path.insert(0, ROOT)
+    import auth
+    import storage
+    storage.set_backend(storage.FileBackend(data_dir))
+    auth.add_user(email, {"name": "Load Test", "password_hash": auth.hash_password(password)})
+
+
+async def wait_until_up(client, base_url, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            await client.fetch(f"{base_url}/api/health")
+            return
+        except (ConnectionError, HTTPClientError, OSError):
+            await asyncio.sleep(0.1)
+    raise RuntimeError("API server did not start")
+
+
+async def run_load(base_url, total, concurrency, mix):
+    client = AsyncHTTPClient(max_clients=concurrency)
+    await wait_until_up(client, base_url)
+
+    response = await client.fetch(
+        f"{base_url}/api/login", method="POST",
+        body=json.dumps({"email": "load@example.com", "password": "load-test"})
+    )
+    headers = {"Authorization": f"Bearer {json.loads(response.body)['token']}"}
+
+    requests = {
+        "generate": ("/api/recipes", "POST", {"preferences": "A quick pasta dish", "servings": 2}),
+        "ideas": ("/api/recipe-ideas", "POST", {"ingredients": ["Chicken", "Rice", "Broccoli"]}),
+        "history": ("/api/recipes", "GET", None),
+    }
+    latencies = {name: [] for name in requests}
+    errors = 0
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(mix[i % len(mix)])
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            name = queue.get_nowait()
+            path, method, body = requests[name]
+            start = time.perf_counter()
+            try:
+                await client.fetch(
+                    f"{base_url}{path}", method=method, headers=headers,
+                    body=json.dumps(body) if body is not None else None,
+                    request_timeout=120
+                )
+                latencies[name].append(time.perf_counter() - start)
+            except Exception:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(all_latencies) / elapsed, 1),
+        "overall": latency_summary(all_latencies),
+        "by_endpoint": {name: latency_summary(values) for name, values in latencies.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.5, help="Stand-in model seconds per call")
+    parser.add_argument("--mix", default="generate,ideas,history,history",
+                        help="Comma-separated request mix: generate, ideas, history")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        register_user(data_dir, "load@example.com", "load-test")
+        port = free_port()
+        server = start_server(port, data_dir, args.latency)
+        try:
+            report = asyncio.run(run_load(
+                f"http://127.0.0.1:{port}", args.requests, args.concurrency, args.mix.split(",")
+            ))
+        finally:
+            server.terminate()
+            server.wait()
+
+    report["model_latency_s"] = args.latency
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
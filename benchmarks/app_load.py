@@ -0,0 +1,267 @@
+"""Concurrent-session load harness for the Streamlit app.
+
+Drives ``app.py`` through Streamlit's AppTest in N concurrent sessions, each
+scripting a realistic flow (login, generate, cook with ingredients, browse
+history) against the local stand-in model, and reports page latency
+percentiles, throughput, CPU and RSS.
+
+    python -m benchmarks.app_load --sessions 20 --iterations 3 --latency 0.5
+    python -m benchmarks.app_load --save-baseline     # record a baseline
+    python -m benchmarks.app_load --compare           # fail on regressions
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
+from benchmarks.util import latency_summary
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "app.py")
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "baselines", "app_load.json")
+
+PASSWORD = "load-test"
+
+
+def current_rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize() / 1024 / 1024
+    except OSError:
+        return 0.0
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def share_test_runtime():
+    """Let concurrent AppTest sessions share one mock Streamlit runtime
+
+    AppTest installs and clears a global mock Runtime around every run, which
+    is fine for one session at a time but breaks concurrent ones. Pin a single
+    mock for the whole load test instead.
+    """
+    from unittest.mock import MagicMock
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+
+    shared = MagicMock(spec=Runtime)
+    shared.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    shared.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime.instance = classmethod(lambda cls: shared)
+    Runtime.exists = classmethod(lambda cls: True)
+
+
+class Session:
+    """One simulated user clicking through the app"""
+
+    def __init__(self, email, timeout, latencies, lock):
+        from streamlit.testing.v1 import AppTest
+        self.email = email
+        self.app = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        self.latencies = latencies
+        self.lock = lock
+        self.reloads = 0
+
+    def _run(self, step):
+        start = time.perf_counter()
+        self.app.run()
+        elapsed = time.perf_counter() - start
+        if self.app.exception:
+            raise RuntimeError(f"{step} failed: {self.app.exception[0].message}")
+        with self.lock:
+            self.latencies.setdefault(step, []).append(elapsed)
+
+    def _widget(self, find):
+        # Under heavy concurrency AppTest occasionally returns a partial element
+        # tree; reload the page (not timed) rather than failing the session
+        for _ in range(3):
+            try:
+                return find()
+            except (IndexError, StopIteration):
+                self.reloads += 1
+                self.app._run()
+        return find()
+
+    def _click(self, label):
+        self._widget(lambda: next(button for button in self.app.button if button.label == label)).click()
+
+    def _input(self, text):
+        self._widget(lambda: self.app.text_area[0]).input(text)
+
+    def _navigate(self, page):
+        self._widget(lambda: self.app.sidebar.radio[0]).set_value(page)
+
+    def login(self):
+        self._run("open")
+        self.app.text_input(key="login_email").input(self.email)
+        self.app.text_input(key="login_password").input(PASSWORD)
+        self._click("Login")
+        self._run("login")
+        # The login rerun leaves stale login widgets in AppTest's element tree;
+        # start from a clean page load with the same session state
+        self.app._run()
+
+    def generate(self):
+        self._navigate("Generate New Recipe")
+        self._run("navigate")
+        self._input("A quick pasta dish")
+        self._click("Generate Recipe")
+        self._run("generate")
+
+    def cook_with_ingredients(self):
+        self._navigate("Cook with Ingredients")
+        self._run("navigate")
+        self._input("2 Chicken breasts\nRice\nbrocoli\nGarlic cloves")
+        self._click("Find Recipe Ideas")
+        self._run("recipe_ideas")
+
+    def browse_history(self):
+        self._navigate("Recipe History")
+        self._run("history")
+
+
+def run_load(sessions, iterations, timeout):
+    import auth
+
+    share_test_runtime()
+    latencies = {}
+    errors = []
+    reloads = []
+    lock = threading.Lock()
+    emails = [f"load{i}@example.com" for i in range(sessions)]
+    for email in emails:
+        auth.add_user(email, {"name": "Load Test", "password_hash": auth.hash_password(PASSWORD)})
+
+    def user_flow(email):
+        session = Session(email, timeout, latencies, lock)
+        try:
+            session.login()
+            for _ in range(iterations):
+                session.generate()
+                session.cook_with_ingredients()
+                session.browse_history()
+        except Exception as e:
+            with lock:
+                errors.append(f"{email}: {type(e).__name__}: {e} ({traceback.extract_tb(e.__traceback__)[-1].line})")
+        with lock:
+            reloads.append(session.reloads)
+
+    threads = [threading.Thread(target=user_flow, args=(email,)) for email in emails]
+    cpu_start = cpu_seconds()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    cpu_used = cpu_seconds() - cpu_start
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        "sessions": sessions,
+        "iterations": iterations,
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "harness_reloads": sum(reloads),
+        "elapsed_s": round(elapsed, 2),
+        "page_runs": len(all_latencies),
+        "throughput_pages_per_s": round(len(all_latencies) / elapsed, 2),
+        "cpu_s": round(cpu_used, 2),
+        "cpu_utilization": round(cpu_used / elapsed, 2),
+        "rss_mb": round(current_rss_mb(), 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "overall": latency_summary(all_latencies),
+        "by_step": {step: latency_summary(values) for step, values in sorted(latencies.items())},
+    }
+
+
+def compare(report, baseline, tolerance):
+    """List metrics that regressed by more than tolerance (a fraction) against the baseline"""
+    regressions = []
+    checks = [("overall", "p50_ms"), ("overall", "p95_ms"), ("overall", "p99_ms")]
+    checks += [("by_step", step) for step in baseline.get("by_step", {})]
+    for section, key in checks:
+        if section == "by_step":
+            # Per-step samples are small, so compare the median rather than the tail
+            old = baseline["by_step"][key]["p50_ms"]
+            new = report["by_step"].get(key, {}).get("p50_ms", 0.0)
+            name = f"{key} p50_ms"
+        else:
+            old, new, name = baseline[section][key], report[section][key], key
+        if old and new > old * (1 + tolerance):
+            regressions.append(f"{name}: {old} -> {new}")
+    if baseline["throughput_pages_per_s"] and \
+            report["throughput_pages_per_s"] < baseline["throughput_pages_per_s"] * (1 - tolerance):
+        regressions.append(
+            f"throughput_pages_per_s: {baseline['throughput_pages_per_s']} -> {report['throughput_pages_per_s']}"
+        )
+    if baseline["peak_rss_mb"] and report["peak_rss_mb"] > baseline["peak_rss_mb"] * (1 + tolerance):
+        regressions.append(f"peak_rss_mb: {baseline['peak_rss_mb']} -> {report['peak_rss_mb']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=2, help="Flow repetitions per session after login")
+    parser.add_argument("--latency", type=float, default=0.5, help="Stand-in model seconds per call")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds allowed per page run")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="Exit non-zero if the run regressed")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression as a fraction")
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix="app-load-")
+    os.environ.update({
+        "GEMINI_BACKEND": "stub",
+        "STUB_MODEL_LATENCY": str(args.latency),
+        "STATE_BACKEND": "file",
+        "STATE_URL": data_dir,
+    })
+    sys.path.insert(0, ROOT)
+
+    report = run_load(args.sessions, args.iterations, args.timeout)
+    report["model_latency_s"] = args.latency
+    print(json.dumps(report, indent=2))
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+
+    if args.compare:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if (baseline["sessions"], baseline["iterations"], baseline["model_latency_s"]) != \
+                (args.sessions, args.iterations, args.latency):
+            print("Warning: baseline was recorded with different --sessions/--iterations/--latency")
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print("Regressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
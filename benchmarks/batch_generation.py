@@ -0,0 +1,74 @@
+"""Compare N single generate_recipe calls with one batched call.
+
+Runs against the local stand-in model, whose latency has a fixed per-call
+part and a per-output-token part, and reports model calls, prompt/output
+tokens and wall time for both approaches.
+
+    python -m benchmarks.batch_generation --items 3 --latency 1.0 --token-latency 0.002
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(func):
+    import gemini_utils
+    before = gemini_utils.usage_stats()
+    start = time.perf_counter()
+    results = func()
+    elapsed = time.perf_counter() - start
+    after = gemini_utils.usage_stats()
+    return {
+        "calls": after["calls"] - before["calls"],
+        "prompt_tokens": after["prompt_tokens"] - before["prompt_tokens"],
+        "output_tokens": after["output_tokens"] - before["output_tokens"],
+        "wall_s": round(elapsed, 2),
+        "failed_items": sum(1 for recipe in results if "error" in recipe),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=1.0, help="Stand-in model seconds per call")
+    parser.add_argument("--token-latency", type=float, default=0.002, help="Stand-in seconds per output token")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of batch items returned malformed")
+    args = parser.parse_args()
+
+    os.environ.update({
+        "GEMINI_BACKEND": "stub",
+        "STUB_MODEL_LATENCY": str(args.latency),
+        "STUB_MODEL_TOKEN_LATENCY": str(args.token_latency),
+        "STUB_MODEL_FAILURE_RATE": str(args.failure_rate),
+    })
+    sys.path.insert(0, ROOT)
+    import gemini_utils
+
+    requests = [
+        {
+            "preferences": f"Recipe idea {i + 1}: a weeknight dinner",
+            "dietary_restrictions": ["Vegetarian"],
+            "servings": 2,
+        }
+        for i in range(args.items)
+    ]
+
+    single = measure(lambda: [gemini_utils.generate_recipe(**request) for request in requests])
+    batch = measure(lambda: gemini_utils.generate_recipes_batch(requests))
+
+    report = {
+        "items": args.items,
+        "single_calls": single,
+        "batch": batch,
+        "prompt_token_reduction": round(1 - batch["prompt_tokens"] / single["prompt_tokens"], 3),
+        "wall_time_speedup": round(single["wall_s"] / batch["wall_s"], 2) if batch["wall_s"] else None,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
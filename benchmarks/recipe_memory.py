@@ -0,0 +1,82 @@
+"""Memory used by loaded recipes: plain dicts versus slotted Recipe objects.
+
+    python -m benchmarks.recipe_memory --recipes 10000
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def sample_recipe(i):
+    # Distinct strings per recipe, as when loading a real history from storage
+    return {
+        "title": f"Recipe {i}: Lemon herb chicken with roasted vegetables",
+        "description": f"A bright weeknight dinner number {i} with crispy skin and tender vegetables.",
+        "prep_time": "15 minutes",
+        "cook_time": "40 minutes",
+        "servings": 4,
+        "ingredients": [f"{n + 1} cups ingredient {n} for recipe {i}" for n in range(10)],
+        "instructions": [f"Step {n + 1} of recipe {i}: do the next thing carefully." for n in range(8)],
+        "nutrition_info": {"calories": "520 per serving", "protein": "38g", "carbs": "30g", "fat": "24g"},
+        "shopping_list": [f"Produce: item {n} for recipe {i}" for n in range(8)],
+    }
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    objects = build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return objects, current, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipes", type=int, default=10000)
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    import models
+
+    payloads = [json.dumps(sample_recipe(i)) for i in range(args.recipes)]
+
+    dicts, dict_bytes, dict_time = measure(lambda: [json.loads(payload) for payload in payloads])
+    del dicts
+    recipes, recipe_bytes, recipe_time = measure(
+        lambda: [models.Recipe.from_dict(json.loads(payload)) for payload in payloads]
+    )
+    # History is stored in the compact positional form, which loads without validation
+    compact_payloads = [json.dumps(recipe.to_compact()) for recipe in recipes]
+    del recipes
+    _, _, compact_time = measure(
+        lambda: [models.Recipe.from_compact(json.loads(payload)) for payload in compact_payloads]
+    )
+
+    report = {
+        "recipes": args.recipes,
+        "dict_mb": round(dict_bytes / 1024 / 1024, 2),
+        "recipe_mb": round(recipe_bytes / 1024 / 1024, 2),
+        "bytes_per_recipe_dict": dict_bytes // args.recipes,
+        "bytes_per_recipe_slotted": recipe_bytes // args.recipes,
+        "memory_reduction": round(1 - recipe_bytes / dict_bytes, 3),
+        "load_ms_dict": round(dict_time * 1000, 1),
+        "load_ms_recipe": round(recipe_time * 1000, 1),
+        "load_ms_recipe_compact": round(compact_time * 1000, 1),
+        "stored_bytes_dict": sum(map(len, payloads)),
+        "stored_bytes_compact": sum(map(len, compact_payloads)),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Compare patch-based recipe edits with regenerating the whole recipe.
+
+Runs against the local stand-in model, whose latency has a fixed per-call
+part and a per-output-token part, and reports prompt/output tokens and wall
+time per edit for both approaches.
+
+    python -m benchmarks.recipe_modification --edits 3 --latency 1.0 --token-latency 0.002
+"""
+import argparse
+import json
+import os
+import sys
+
+from benchmarks.batch_generation import measure
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHANGES = ["make it spicier", "swap chicken for tofu", "make it dairy-free", "halve the salt"]
+
+
+def per_edit(totals, edits):
+    return {
+        "prompt_tokens": round(totals["prompt_tokens"] / edits),
+        "output_tokens": round(totals["output_tokens"] / edits),
+        "wall_s": round(totals["wall_s"] / edits, 2),
+        "failed_items": totals["failed_items"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--edits", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=1.0, help="Stand-in model seconds per call")
+    parser.add_argument("--token-latency", type=float, default=0.002, help="Stand-in seconds per output token")
+    args = parser.parse_args()
+
+    os.environ.update({
+        "GEMINI_BACKEND": "stub",
+        "STUB_MODEL_LATENCY": str(args.latency),
+        "STUB_MODEL_TOKEN_LATENCY": str(args.token_latency),
+    })
+    sys.path.insert(0, ROOT)
+    import gemini_utils
+
+    request = {"preferences": "A weeknight chicken curry", "dietary_restrictions": [], "servings": 4}
+    recipe = gemini_utils.generate_recipe(**request)
+    changes = [CHANGES[i % len(CHANGES)] for i in range(args.edits)]
+
+    regenerate = measure(lambda: [
+        gemini_utils.generate_recipe(**request, additional_info=change) for change in changes
+    ])
+    patch = measure(lambda: [gemini_utils.modify_recipe(recipe, change) for change in changes])
+
+    regenerate, patch = per_edit(regenerate, args.edits), per_edit(patch, args.edits)
+    report = {
+        "edits": args.edits,
+        "full_regeneration_per_edit": regenerate,
+        "patch_per_edit": patch,
+        "output_token_reduction": round(1 - patch["output_tokens"] / regenerate["output_tokens"], 3),
+        "wall_time_speedup": round(regenerate["wall_s"] / patch["wall_s"], 2) if patch["wall_s"] else None,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import threading
+import time
+
+# States of a circuit breaker
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a service whose breaker is open"""
+
+
+class CircuitBreaker:
+    """Stops calling a failing or slow service until it has had time to recover
+
+    Errors and calls slower than latency_threshold both count as failures.
+    After failure_threshold consecutive failures the breaker opens and calls
+    fail fast with CircuitOpenError. After reset_timeout one trial call is let
+    through (half open); its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, name, failure_threshold=5, latency_threshold=30.0, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.latency_threshold = latency_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._listeners = []
+        self._metrics = {
+            "calls": 0,
+            "failures": 0,
+            "slow_calls": 0,
+            "rejected": 0,
+            "transitions": {},
+        }
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def add_listener(self, listener):
+        """Call listener(old_state, new_state) on every state transition"""
+        self._listeners.append(listener)
+
+    def _transition(self, new_state):
+        # Called with the lock held; returns the listeners' arguments
+        old_state = self._state
+        if old_state == new_state:
+            return None
+        self._state = new_state
+        self._opened_at = time.monotonic() if new_state == OPEN else self._opened_at
+        key = f"{old_state}->{new_state}"
+        self._metrics["transitions"][key] = self._metrics["transitions"].get(key, 0) + 1
+        print(f"Circuit breaker {self.name}: {old_state} -> {new_state}")
+        return old_state, new_state
+
+    def _notify(self, change):
+        if change is None:
+            return
+        for listener in self._listeners:
+            try:
+                listener(*change)
+            except Exception as e:
+                print(f"Circuit breaker {self.name} listener failed: {e}")
+
+    def _before_call(self):
+        with self._lock:
+            change = None
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                change = self._transition(HALF_OPEN)
+            if self._state == OPEN or (self._state == HALF_OPEN and self._trial_in_flight):
+                self._metrics["rejected"] += 1
+                rejected = True
+            else:
+                rejected = False
+                if self._state == HALF_OPEN:
+                    self._trial_in_flight = True
+                self._metrics["calls"] += 1
+        self._notify(change)
+        if rejected:
+            raise CircuitOpenError(f"{self.name} is unavailable")
+
+    def _after_call(self, failed, slow):
+        with self._lock:
+            self._trial_in_flight = False
+            if slow:
+                self._metrics["slow_calls"] += 1
+            if failed or slow:
+                self._metrics["failures"] += 1
+                self._consecutive_failures += 1
+                if self._state == HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                    change = self._transition(OPEN)
+                else:
+                    change = None
+            else:
+                self._consecutive_failures = 0
+                change = self._transition(CLOSED)
+        self._notify(change)
+
+    def call(self, func, *args, **kwargs):
+        """Call func through the breaker"""
+        self._before_call()
+        start = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self._after_call(failed=True, slow=False)
+            raise
+        self._after_call(failed=False, slow=time.monotonic() - start > self.latency_threshold)
+        return result
+
+    def metrics(self):
+        """State and counters for monitoring"""
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics["transitions"] = dict(self._metrics["transitions"])
+            metrics["name"] = self.name
+            metrics["state"] = self._state
+            metrics["consecutive_failures"] = self._consecutive_failures
+            return metrics
@@ -1,6 +1,32 @@
 import os
+import threading
 import google.generativeai as genai
 import json
+import circuit_breaker
+import models
+import recipe_store
+
+MODEL_NAME = 'models/gemini-2.0-flash-thinking-exp-01-21'
+
+# Token usage across model calls in this process
+_usage = {"calls": 0, "prompt_tokens": 0, "output_tokens": 0}
+_usage_lock = threading.Lock()
+
+# Model calls go through a circuit breaker: after repeated errors or slow
+# responses, calls fail fast until the service has had time to recover
+breaker = circuit_breaker.CircuitBreaker(
+    "gemini",
+    failure_threshold=int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5")),
+    latency_threshold=float(os.getenv("BREAKER_LATENCY_THRESHOLD", "30")),
+    reset_timeout=float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
+)
+
+# Most requests sent in one batched model call
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "10"))
+
+UNAVAILABLE_ERROR = "The recipe service is unavailable right now. Please try again in a few minutes."
+STALE_NOTICE = ("The recipe service is unavailable right now, so this is a similar recipe from earlier. "
+                "A fresh recipe will be added to your Recipe History once the service is back.")
 
 def setup_gemini():
     api_key = os.getenv("GEMINI_API_KEY")
@@ -8,10 +34,66 @@ def setup_gemini():
         raise ValueError("GEMINI_API_KEY environment variable not set")
     genai.configure(api_key=api_key)
 
-def generate_recipe(preferences, dietary_restrictions, servings, additional_info=""):
-    """Generate a recipe based on user preferences"""
+def get_model():
+    """Return the configured model, or a local stand-in when GEMINI_BACKEND=stub"""
+    if os.getenv("GEMINI_BACKEND") == "stub":
+        import model_stub
+        return model_stub.StubModel()
     setup_gemini()
+    return genai.GenerativeModel(MODEL_NAME)
+
+def generate_content(prompt):
+    """Send a prompt to the model and record its token usage
+    
+    Raises circuit_breaker.CircuitOpenError while the breaker is open.
+    """
+    model = get_model()
+    response = breaker.call(model.generate_content, prompt)
+    usage = getattr(response, "usage_metadata", None)
+    with _usage_lock:
+        _usage["calls"] += 1
+        if usage is not None:
+            _usage["prompt_tokens"] += usage.prompt_token_count
+            _usage["output_tokens"] += usage.candidates_token_count
+    return response
+
+def usage_stats():
+    """Model calls and token counts so far in this process"""
+    with _usage_lock:
+        return dict(_usage)
+
+def breaker_stats():
+    """State and transition counts of the model circuit breaker"""
+    return breaker.metrics()
+
+def stale_recipe(preferences, dietary_restrictions=None, additional_info=""):
+    """Closest stored recipe to a request, marked stale, for use while the model is down"""
+    query = " ".join([preferences, *(dietary_restrictions or []), additional_info or ""])
+    try:
+        recipe = recipe_store.find_similar(query)
+    except Exception as e:
+        print(f"Error looking up a similar recipe: {e}")
+        recipe = None
+    if recipe is None:
+        return {"error": UNAVAILABLE_ERROR}
+    recipe_data = recipe.to_dict()
+    recipe_data["stale"] = True
+    recipe_data["notice"] = STALE_NOTICE
+    return recipe_data
+
+def parse_json_response(response_text):
+    """Extract the JSON payload from a model response"""
+    json_str = response_text
     
+    if "```json" in response_text:
+        json_str = response_text.split("```json")[1].split("```")[0].strip()
+    elif "```" in response_text:
+        json_str = response_text.split("```")[1].strip()
+        
+    return json.loads(json_str)
+
+def generate_recipe(preferences, dietary_restrictions, servings, additional_info=""):
+    """Generate a recipe based on user preferences"""
     restrictions_text = ", ".join(dietary_restrictions) if dietary_restrictions else "None"
     
     prompt = f"""
@@ -48,28 +130,70 @@ def generate_recipe(preferences, dietary_restrictions, servings, additional_info
     }}
     """
     
-    model = genai.GenerativeModel('models/gemini-2.0-flash-thinking-exp-01-21')
-    response = model.generate_content(prompt)
+    try:
+        response = generate_content(prompt)
+    except circuit_breaker.CircuitOpenError:
+        # Serve something close from history rather than make the user wait on an outage
+        return stale_recipe(preferences, dietary_restrictions, additional_info)
+    except Exception as e:
+        print(f"Error calling Gemini: {e}")
+        return {"error": "Failed to generate recipe. Please try again."}
     
     try:
-        response_text = response.text
-        json_str = response_text
-        
-        if "```json" in response_text:
-            json_str = response_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in response_text:
-            json_str = response_text.split("```")[1].strip()
-            
-        recipe_data = json.loads(json_str)
+        # Fill in any fields the model left out so callers never hit a KeyError
+        recipe_data = models.Recipe.from_dict(parse_json_response(response.text)).to_dict()
         return recipe_data
     except Exception as e:
         print(f"Error parsing Gemini response: {e}")
         return {"error": "Failed to generate recipe. Please try again."}
 
+def modify_recipe(recipe_data, change):
+    """Apply a requested change to a recipe by asking the model for a patch
+    
+    Only the affected fields come back from the model, so small edits cost a
+    fraction of the output tokens of regenerating the whole recipe.
+    """
+    try:
+        recipe = models.Recipe.from_dict(recipe_data)
+    except ValueError:
+        return {"error": "This recipe cannot be modified."}
+    
+    prompt = f"""
+    Modify this recipe as requested.
+    Recipe: {json.dumps(recipe.to_dict(), ensure_ascii=False)}
+    Requested change: {change}
+    
+    Reply with a JSON patch containing only what changes, leaving out anything that stays the same:
+    {{
+        "set": {{"title": "New title", "description": "...", "prep_time": "...", "cook_time": "...", "servings": "..."}},
+        "nutrition_info": {{"calories": "...", "protein": "...", "carbs": "...", "fat": "..."}},
+        "ingredients": [
+            {{"op": "replace", "index": 0, "value": "Changed item"}},
+            {{"op": "insert", "index": 3, "value": "New item, placed before item 3"}},
+            {{"op": "delete", "index": 5}}
+        ],
+        "instructions": ["Operations as for ingredients"],
+        "shopping_list": ["Operations as for ingredients"]
+    }}
+    List indexes start at 0 and refer to the recipe as given.
+    """
+    
+    try:
+        response = generate_content(prompt)
+    except circuit_breaker.CircuitOpenError:
+        return {"error": UNAVAILABLE_ERROR}
+    except Exception as e:
+        print(f"Error calling Gemini: {e}")
+        return {"error": "Failed to modify recipe. Please try again."}
+    
+    try:
+        return recipe.apply_patch(parse_json_response(response.text)).to_dict()
+    except Exception as e:
+        print(f"Error applying recipe patch: {e}")
+        return {"error": "Failed to modify recipe. Please try again."}
+
 def generate_recipes_from_ingredients(ingredients, preferences="", dietary_restrictions=None, servings=2):
     """Generate recipe ideas based on available ingredients"""
-    setup_gemini()
-    
     ingredients_text = ", ".join(ingredients)
     restrictions_text = ", ".join(dietary_restrictions) if dietary_restrictions else "None"
     
@@ -93,24 +217,123 @@ def generate_recipes_from_ingredients(ingredients, preferences="", dietary_restr
     }}
     """
     
-    model = genai.GenerativeModel('models/gemini-2.0-flash-thinking-exp-01-21')
-    response = model.generate_content(prompt)
+    try:
+        response = generate_content(prompt)
+    except circuit_breaker.CircuitOpenError:
+        return {"error": UNAVAILABLE_ERROR}
+    except Exception as e:
+        print(f"Error calling Gemini: {e}")
+        return {"error": "Failed to generate recipe ideas. Please try again."}
     
     try:
-        response_text = response.text
-        json_str = response_text
-        
-        if "```json" in response_text:
-            json_str = response_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in response_text:
-            json_str = response_text.split("```")[1].strip()
-            
-        recipe_ideas = json.loads(json_str)
+        recipe_ideas = []
+        for item in parse_json_response(response.text):
+            try:
+                recipe_ideas.append(models.RecipeIdea.from_dict(item).to_dict())
+            except ValueError:
+                continue
+        if not recipe_ideas:
+            raise ValueError("No usable recipe ideas in response")
         return recipe_ideas
     except Exception as e:
         print(f"Error parsing Gemini response: {e}")
         return {"error": "Failed to generate recipe ideas. Please try again."}
 
+def generate_recipes_batch(requests, max_retries=1):
+    """Generate full recipes for several requests in one model call
+    
+    Each request is a dict of generate_recipe arguments. Returns one recipe
+    (or error dict) per request, in order. Items that come back missing or
+    malformed are re-requested together, up to max_retries more calls.
+    While the circuit breaker is open, remaining requests get stale recipes.
+    Raises ValueError for more than MAX_BATCH_SIZE requests.
+    """
+    if len(requests) > MAX_BATCH_SIZE:
+        raise ValueError(f"At most {MAX_BATCH_SIZE} recipes can be generated in one batch")
+    results = [None] * len(requests)
+    pending = list(range(len(requests)))
+    
+    for _ in range(max_retries + 1):
+        if not pending:
+            break
+        
+        request_lines = []
+        for number, index in enumerate(pending, 1):
+            request = requests[index]
+            restrictions = request.get("dietary_restrictions")
+            restrictions_text = ", ".join(restrictions) if restrictions else "None"
+            request_lines.append(
+                f"{number}. Preferences: {request['preferences']} | "
+                f"Dietary Restrictions: {restrictions_text} | "
+                f"Servings: {request.get('servings', 2)} | "
+                f"Additional Information: {request.get('additional_info', '')}"
+            )
+        requests_text = "\n    ".join(request_lines)
+        
+        prompt = f"""
+    Create {len(pending)} recipes, one for each numbered request below:
+    {requests_text}
+    
+    Format your response as a JSON array with exactly {len(pending)} objects, in request order, each with the following structure:
+    {{
+        "request": "The request number",
+        "title": "Recipe Title",
+        "description": "Brief description of the dish",
+        "prep_time": "Preparation time in minutes",
+        "cook_time": "Cooking time in minutes",
+        "servings": "Servings from the request",
+        "ingredients": ["Ingredient with quantity"],
+        "instructions": ["Step"],
+        "nutrition_info": {{
+            "calories": "per serving",
+            "protein": "in grams",
+            "carbs": "in grams",
+            "fat": "in grams"
+        }},
+        "shopping_list": ["Categorized shopping list items"]
+    }}
+    """
+        
+        try:
+            response = generate_content(prompt)
+            items = parse_json_response(response.text)
+        except circuit_breaker.CircuitOpenError:
+            for index in pending:
+                request = requests[index]
+                results[index] = stale_recipe(
+                    request["preferences"], request.get("dietary_restrictions"), request.get("additional_info", "")
+                )
+            pending = []
+            break
+        except Exception as e:
+            print(f"Error in batch recipe generation: {e}")
+            continue
+        if not isinstance(items, list):
+            continue
+        
+        # Match items to requests by their number, falling back to position
+        by_number = {}
+        for position, item in enumerate(items, 1):
+            if not isinstance(item, dict):
+                continue
+            try:
+                number = int(item.pop("request", position))
+            except (TypeError, ValueError):
+                number = position
+            by_number.setdefault(number, item)
+        
+        still_pending = []
+        for number, index in enumerate(pending, 1):
+            try:
+                results[index] = models.Recipe.from_dict(by_number.get(number), strict=True).to_dict()
+            except ValueError:
+                still_pending.append(index)
+        pending = still_pending
+    
+    for index in pending:
+        results[index] = {"error": "Failed to generate recipe. Please try again."}
+    return results
+
 if __name__ == "__main__":
     recipe = generate_recipe("spicy Italian", ["vegetarian"], 4, "use fresh herbs")
     print(json.dumps(recipe, indent=2))
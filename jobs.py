@@ -0,0 +1,247 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import auth
+import circuit_breaker
+import gemini_utils
+import recipe_store
+
+# Recipe generations run on a bounded pool of background workers so the
+# Streamlit script thread is never pinned for the length of a model call.
+MAX_WORKERS = int(os.getenv("GENERATION_WORKERS", "4"))
+MAX_QUEUE = int(os.getenv("GENERATION_QUEUE_SIZE", "64"))
+# Finished jobs are kept this long (seconds) for pages to pick up the result
+JOB_TTL = int(os.getenv("GENERATION_JOB_TTL", "3600"))
+
+
+class QueueFullError(Exception):
+    """Raised when too many generation jobs are already waiting"""
+
+
+class JobQueue:
+    """Bounded background job pool with status tracking"""
+
+    def __init__(self, max_workers=MAX_WORKERS, max_queue=MAX_QUEUE, job_ttl=JOB_TTL):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.job_ttl = job_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="generation")
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._completed = 0
+        self._failed = 0
+        self._busy_seconds = 0.0
+        self._started_at = time.monotonic()
+
+    def submit(self, func, *args, **kwargs):
+        """Queue a call and return its job ID"""
+        with self._lock:
+            self._prune()
+            queued = sum(1 for job in self._jobs.values() if job["status"] == "queued")
+            if queued >= self.max_queue:
+                raise QueueFullError("Too many recipes are being generated right now. Please try again shortly.")
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                "id": job_id,
+                "status": "queued",
+                "result": None,
+                "error": None,
+                "submitted_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+            }
+        self._executor.submit(self._run, job_id, func, args, kwargs)
+        return job_id
+
+    def _run(self, job_id, func, args, kwargs):
+        with self._lock:
+            job = self._jobs[job_id]
+            job["status"] = "running"
+            job["started_at"] = time.time()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            print(f"Generation job {job_id} failed: {e}")
+            with self._lock:
+                job["status"] = "failed"
+                job["error"] = str(e)
+                self._failed += 1
+        else:
+            with self._lock:
+                job["status"] = "done"
+                job["result"] = result
+                self._completed += 1
+        finally:
+            with self._lock:
+                job["finished_at"] = time.time()
+                self._busy_seconds += job["finished_at"] - job["started_at"]
+
+    def _prune(self):
+        cutoff = time.time() - self.job_ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["finished_at"] is not None and job["finished_at"] < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        """Return a snapshot of a job, or None if it is unknown or expired"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def position(self, job_id):
+        """Number of queued jobs submitted before this one"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job["status"] != "queued":
+                return 0
+            return sum(
+                1 for other in self._jobs.values()
+                if other["status"] == "queued" and other["submitted_at"] < job["submitted_at"]
+            )
+
+    def stats(self):
+        """Queue depth and worker utilization for capacity planning"""
+        with self._lock:
+            queued = sum(1 for job in self._jobs.values() if job["status"] == "queued")
+            running = sum(1 for job in self._jobs.values() if job["status"] == "running")
+            busy = self._busy_seconds + sum(
+                time.time() - job["started_at"]
+                for job in self._jobs.values() if job["status"] == "running"
+            )
+            uptime = time.monotonic() - self._started_at
+            return {
+                "queued": queued,
+                "running": running,
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "utilization": running / self.max_workers,
+                "average_utilization": busy / (uptime * self.max_workers) if uptime else 0.0,
+                "completed": self._completed,
+                "failed": self._failed,
+            }
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    """Return the process-wide generation job queue"""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = JobQueue()
+    return _queue
+
+
+# Requests answered with a stale recipe during a model outage, regenerated
+# once the circuit breaker closes again: (user_email, prompt, generate_kwargs)
+_refreshes = []
+_refresh_lock = threading.Lock()
+_refresh_timer = None
+
+
+def schedule_refresh(user_email, prompt, generate_kwargs):
+    """Regenerate a request in the background once the model is available again"""
+    global _refresh_timer
+    with _refresh_lock:
+        _refreshes.append((user_email, prompt, generate_kwargs))
+        # Retry after the breaker's cooldown even if no other traffic arrives to probe it
+        if _refresh_timer is None:
+            _refresh_timer = threading.Timer(gemini_utils.breaker.reset_timeout, _run_refreshes)
+            _refresh_timer.daemon = True
+            _refresh_timer.start()
+
+
+def _run_refreshes():
+    global _refresh_timer
+    with _refresh_lock:
+        pending = list(_refreshes)
+        _refreshes.clear()
+        if _refresh_timer is not None:
+            _refresh_timer.cancel()
+            _refresh_timer = None
+    for user_email, prompt, generate_kwargs in pending:
+        try:
+            get_queue().submit(_generate_and_save, user_email, prompt, generate_kwargs)
+        except QueueFullError:
+            schedule_refresh(user_email, prompt, generate_kwargs)
+
+
+def _on_breaker_transition(old_state, new_state):
+    if new_state == circuit_breaker.CLOSED:
+        _run_refreshes()
+
+
+gemini_utils.breaker.add_listener(_on_breaker_transition)
+
+
+def save_result(user_email, prompt, recipe_data, generate_kwargs):
+    """Save a generated recipe to history, or schedule a refresh if it is stale"""
+    if recipe_data.get("stale"):
+        # A stand-in from stored history; the real recipe is saved when it is regenerated
+        schedule_refresh(user_email, prompt, generate_kwargs)
+    else:
+        auth.save_recipe(user_email, prompt, recipe_data)
+
+
+def _generate_and_save(user_email, prompt, generate_kwargs):
+    recipe_data = gemini_utils.generate_recipe(**generate_kwargs)
+    # Saved from the worker so the recipe reaches history even if the user left the page
+    save_result(user_email, prompt, recipe_data, generate_kwargs)
+    return recipe_data
+
+
+def submit_generation(user_email, prompt, **generate_kwargs):
+    """Queue a generate_recipe call whose result is saved to the user's history"""
+    return get_queue().submit(_generate_and_save, user_email, prompt, generate_kwargs)
+
+
+def _generate_batch_and_save(user_email, prompts, requests):
+    recipes = gemini_utils.generate_recipes_batch(requests)
+    for prompt, request, recipe_data in zip(prompts, requests, recipes):
+        save_result(user_email, prompt, recipe_data, request)
+    return recipes
+
+
+def submit_batch_generation(user_email, prompts, requests):
+    """Queue one batched generation for several requests, saving each recipe to history"""
+    return get_queue().submit(_generate_batch_and_save, user_email, prompts, requests)
+
+
+def modify_and_save(user_email, recipe_hash, change):
+    """Apply a change to a stored recipe and save the result as a new version"""
+    recipe_data = gemini_utils.modify_recipe(recipe_store.get_recipe(recipe_hash), change)
+    if "error" not in recipe_data:
+        auth.save_recipe(user_email, change, recipe_data, parent_hash=recipe_hash)
+    return recipe_data
+
+
+def submit_modification(user_email, recipe_hash, change):
+    """Queue a change to a stored recipe, saving the result as a new version in history"""
+    return get_queue().submit(modify_and_save, user_email, recipe_hash, change)
+
+
+def submit_recipe_ideas(**generate_kwargs):
+    """Queue a generate_recipes_from_ingredients call; ideas are not saved to history"""
+    return get_queue().submit(gemini_utils.generate_recipes_from_ingredients, **generate_kwargs)
+
+
+def get_job(job_id):
+    """Return a snapshot of a job from the process-wide queue"""
+    return get_queue().get(job_id)
+
+
+def stats():
+    """Queue statistics for the process-wide queue"""
+    stats = get_queue().stats()
+    with _refresh_lock:
+        stats["pending_refreshes"] = len(_refreshes)
+    return stats
@@ -0,0 +1,127 @@
+import json
+import os
+import random
+import re
+import time
+
+# Local stand-in for the Gemini model, used for load tests and benchmarks.
+# Enable it with GEMINI_BACKEND=stub; STUB_MODEL_LATENCY sets the simulated
+# seconds per call and STUB_MODEL_TOKEN_LATENCY the extra seconds per output token.
+DEFAULT_LATENCY = float(os.getenv("STUB_MODEL_LATENCY", "1.0"))
+DEFAULT_TOKEN_LATENCY = float(os.getenv("STUB_MODEL_TOKEN_LATENCY", "0"))
+# Fraction of batch items returned malformed, to exercise re-requests
+DEFAULT_FAILURE_RATE = float(os.getenv("STUB_MODEL_FAILURE_RATE", "0"))
+# Fraction of calls that raise, to simulate an outage
+DEFAULT_ERROR_RATE = float(os.getenv("STUB_MODEL_ERROR_RATE", "0"))
+
+
+def count_tokens(text):
+    """Rough token estimate (about four characters per token)"""
+    return max(1, len(text) // 4)
+
+
+class UsageMetadata:
+    def __init__(self, prompt_token_count, candidates_token_count):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+        self.total_token_count = prompt_token_count + candidates_token_count
+
+
+class StubResponse:
+    def __init__(self, text, prompt):
+        self.text = text
+        self.usage_metadata = UsageMetadata(count_tokens(prompt), count_tokens(text))
+
+
+def _field(prompt, label, default=""):
+    match = re.search(rf"- {label}: (.*)", prompt)
+    return match.group(1).strip() if match else default
+
+
+def fake_recipe(preferences="Stand-in dish", servings=2):
+    """A recipe shaped like real model output"""
+    return {
+        "title": f"Stand-in {preferences[:40]}".strip(),
+        "description": "A recipe produced by the local stand-in model.",
+        "prep_time": "15 minutes",
+        "cook_time": "25 minutes",
+        "servings": servings,
+        "ingredients": [f"{i + 1} cup ingredient {i + 1}" for i in range(8)],
+        "instructions": [f"Do step {i + 1} carefully until done." for i in range(6)],
+        "nutrition_info": {
+            "calories": "450 per serving",
+            "protein": "25g",
+            "carbs": "50g",
+            "fat": "15g"
+        },
+        "shopping_list": [f"Produce: item {i + 1}" for i in range(6)]
+    }
+
+
+def fake_patch(recipe, change):
+    """A modification patch touching a few fields, shaped like real model output"""
+    return {
+        "set": {"title": f"{recipe['title']} ({change[:40]})".strip()},
+        "ingredients": [{"op": "replace", "index": 0, "value": f"1 cup ingredient for {change[:40]}"}],
+        "instructions": [{"op": "insert", "index": len(recipe["instructions"]),
+                          "value": f"Adjust to taste: {change[:40]}."}],
+    }
+
+
+def fake_recipe_ideas(ingredients_text):
+    """Three recipe ideas shaped like real model output"""
+    ingredients = [ing.strip() for ing in ingredients_text.split(",") if ing.strip()]
+    return [
+        {
+            "title": f"Stand-in idea {i + 1}",
+            "description": "A recipe idea produced by the local stand-in model.",
+            "ingredients_required": ingredients[:3],
+            "additional_ingredients_needed": ["Salt", "Pepper"],
+            "difficulty": ["Easy", "Medium", "Hard"][i],
+            "estimated_time": f"{20 + 10 * i} minutes"
+        }
+        for i in range(3)
+    ]
+
+
+class StubModel:
+    """Answers recipe prompts with canned JSON after a configurable delay"""
+
+    def __init__(self, latency=None, failure_rate=None, token_latency=None, error_rate=None):
+        self.latency = DEFAULT_LATENCY if latency is None else latency
+        self.token_latency = DEFAULT_TOKEN_LATENCY if token_latency is None else token_latency
+        self.failure_rate = DEFAULT_FAILURE_RATE if failure_rate is None else failure_rate
+        self.error_rate = DEFAULT_ERROR_RATE if error_rate is None else error_rate
+
+    def _batch(self, prompt):
+        items = []
+        for match in re.finditer(r"^\s*(\d+)\. Preferences: (.*?) \|.*?Servings: (\d+)", prompt, re.MULTILINE):
+            recipe = {"request": int(match.group(1)), **fake_recipe(match.group(2), int(match.group(3)))}
+            if random.random() < self.failure_rate:
+                del recipe["ingredients"]
+            items.append(recipe)
+        return items
+
+    def respond(self, prompt):
+        """Build the JSON payload for a prompt"""
+        if "one for each numbered request" in prompt:
+            return self._batch(prompt)
+        if "Requested change:" in prompt:
+            recipe = json.loads(re.search(r"Recipe: (.*)", prompt).group(1))
+            return fake_patch(recipe, re.search(r"Requested change: (.*)", prompt).group(1).strip())
+        if "recipe ideas using mainly these ingredients" in prompt:
+            ingredients_text = prompt.split("these ingredients:")[1].split("\n")[1]
+            return fake_recipe_ideas(ingredients_text)
+        servings = _field(prompt, "Servings", "2")
+        return fake_recipe(_field(prompt, "Preferences"), int(servings) if servings.isdigit() else 2)
+
+    def generate_content(self, prompt):
+        if random.random() < self.error_rate:
+            time.sleep(self.latency)
+            raise RuntimeError("503 The stub model is unavailable")
+        text = "```json\n" + json.dumps(self.respond(prompt), indent=2) + "\n```"
+        response = StubResponse(text, prompt)
+        delay = self.latency + self.token_latency * response.usage_metadata.candidates_token_count
+        if delay:
+            time.sleep(delay)
+        return response
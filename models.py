@@ -0,0 +1,221 @@
+from dataclasses import dataclass, replace
+
+# Typed, slotted recipe objects. Model output and stored history are turned
+# into these once, so display code can rely on every field being present and
+# long histories do not keep a dict-of-lists per recipe in memory.
+
+NUTRITION_FIELDS = ("calories", "protein", "carbs", "fat")
+# Layout version written as the first value of Recipe.to_compact()
+COMPACT_VERSION = 1
+# Types a complete recipe must have, for callers that can re-request incomplete ones
+STRICT_FIELD_TYPES = {
+    "title": str, "description": str, "prep_time": (str, int), "cook_time": (str, int),
+    "servings": (int, str), "ingredients": list, "instructions": list,
+    "nutrition_info": dict, "shopping_list": list,
+}
+# Recipe fields a modification patch can set or edit item by item
+PATCH_TEXT_FIELDS = ("title", "description", "prep_time", "cook_time", "servings")
+PATCH_LIST_FIELDS = ("ingredients", "instructions", "shopping_list")
+
+
+def _text(value, default=""):
+    if value is None:
+        return default
+    return value if isinstance(value, str) else str(value)
+
+
+def _patch_list(items, ops):
+    """Apply replace/insert/delete ops to a tuple; every index refers to the original list"""
+    if not isinstance(ops, list):
+        raise ValueError("List edits must be a list of operations")
+    replaced, deleted, inserted = {}, set(), {}
+    for op in ops:
+        if not isinstance(op, dict) or op.get("op") not in ("replace", "insert", "delete"):
+            raise ValueError(f"Unknown list operation: {op!r}")
+        try:
+            index = int(op.get("index"))
+        except (TypeError, ValueError):
+            raise ValueError(f"List index is not a number: {op!r}")
+        limit = len(items) if op["op"] == "insert" else len(items) - 1
+        if not 0 <= index <= limit:
+            raise ValueError(f"List index out of range: {op!r}")
+        if op["op"] == "replace":
+            replaced[index] = _text(op.get("value"))
+        elif op["op"] == "delete":
+            deleted.add(index)
+        else:
+            inserted.setdefault(index, []).append(_text(op.get("value")))
+
+    result = []
+    for index in range(len(items) + 1):
+        result.extend(inserted.get(index, ()))
+        if index < len(items) and index not in deleted:
+            result.append(replaced.get(index, items[index]))
+    return tuple(result)
+
+
+def _texts(value):
+    if value is None:
+        return ()
+    if isinstance(value, str):
+        return (value,)
+    return tuple(_text(item) for item in value)
+
+
+@dataclass(slots=True, frozen=True)
+class NutritionInfo:
+    calories: str = "N/A"
+    protein: str = "N/A"
+    carbs: str = "N/A"
+    fat: str = "N/A"
+
+    @classmethod
+    def from_dict(cls, data):
+        if not isinstance(data, dict):
+            return cls()
+        return cls(*(_text(data.get(field), "N/A") for field in NUTRITION_FIELDS))
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in NUTRITION_FIELDS}
+
+
+@dataclass(slots=True, frozen=True)
+class Recipe:
+    title: str
+    description: str = ""
+    prep_time: str = "N/A"
+    cook_time: str = "N/A"
+    servings: str = ""
+    ingredients: tuple = ()
+    instructions: tuple = ()
+    nutrition_info: NutritionInfo = NutritionInfo()
+    shopping_list: tuple = ()
+
+    @classmethod
+    def from_dict(cls, data, strict=False):
+        """Build a recipe from model output or a stored dict, filling in missing fields
+
+        Raises ValueError for anything that is not a recipe (e.g. an error payload).
+        With strict=True, also raises unless every field is present with the right type.
+        """
+        if not isinstance(data, dict) or "error" in data or not data.get("title"):
+            raise ValueError("Not a recipe")
+        if strict:
+            for field, field_type in STRICT_FIELD_TYPES.items():
+                if not isinstance(data.get(field), field_type):
+                    raise ValueError(f"Missing or malformed recipe field: {field}")
+            if not all(field in data["nutrition_info"] for field in NUTRITION_FIELDS):
+                raise ValueError("Missing nutrition fields")
+        return cls(
+            _text(data["title"]),
+            _text(data.get("description")),
+            _text(data.get("prep_time"), "N/A"),
+            _text(data.get("cook_time"), "N/A"),
+            _text(data.get("servings")),
+            _texts(data.get("ingredients")),
+            _texts(data.get("instructions")),
+            NutritionInfo.from_dict(data.get("nutrition_info")),
+            _texts(data.get("shopping_list")),
+        )
+
+    def to_dict(self):
+        return {
+            "title": self.title,
+            "description": self.description,
+            "prep_time": self.prep_time,
+            "cook_time": self.cook_time,
+            "servings": self.servings,
+            "ingredients": list(self.ingredients),
+            "instructions": list(self.instructions),
+            "nutrition_info": self.nutrition_info.to_dict(),
+            "shopping_list": list(self.shopping_list),
+        }
+
+    def apply_patch(self, patch):
+        """Return a new Recipe with a modification patch applied
+
+        A patch sets top-level text fields and nutrition values directly and
+        edits list fields with {"op": "replace"|"insert"|"delete", "index", "value"}
+        operations. Raises ValueError for a malformed patch.
+        """
+        if not isinstance(patch, dict):
+            raise ValueError("Patch must be an object")
+        changes = {}
+        for field, value in (patch.get("set") or {}).items():
+            if field not in PATCH_TEXT_FIELDS:
+                raise ValueError(f"Cannot set field: {field}")
+            changes[field] = _text(value)
+        nutrition = patch.get("nutrition_info")
+        if nutrition:
+            if not isinstance(nutrition, dict) or not set(nutrition) <= set(NUTRITION_FIELDS):
+                raise ValueError("Unknown nutrition fields")
+            changes["nutrition_info"] = replace(
+                self.nutrition_info, **{field: _text(value) for field, value in nutrition.items()}
+            )
+        for field in PATCH_LIST_FIELDS:
+            if patch.get(field):
+                changes[field] = _patch_list(getattr(self, field), patch[field])
+        return replace(self, **changes)
+
+    def to_compact(self):
+        """Positional form for storage, without repeating field names
+
+        The first value is COMPACT_VERSION, so the layout can change later.
+        """
+        nutrition = self.nutrition_info
+        return [
+            COMPACT_VERSION,
+            self.title, self.description, self.prep_time, self.cook_time, self.servings,
+            list(self.ingredients), list(self.instructions),
+            [nutrition.calories, nutrition.protein, nutrition.carbs, nutrition.fat],
+            list(self.shopping_list),
+        ]
+
+    @classmethod
+    def from_compact(cls, values):
+        """Inverse of to_compact; raises ValueError for an unknown layout"""
+        if values and isinstance(values[0], str):
+            # Written before the layout was versioned; same fields as version 1
+            values = [1, *values]
+        if not values or values[0] != COMPACT_VERSION or len(values) != 10:
+            raise ValueError(f"Unsupported compact recipe layout: {values[:1]}")
+        (_, title, description, prep_time, cook_time, servings,
+         ingredients, instructions, nutrition, shopping_list) = values
+        return cls(
+            title, description, prep_time, cook_time, servings,
+            tuple(ingredients), tuple(instructions), NutritionInfo(*nutrition), tuple(shopping_list),
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class RecipeIdea:
+    title: str
+    description: str = ""
+    ingredients_required: tuple = ()
+    additional_ingredients_needed: tuple = ()
+    difficulty: str = "N/A"
+    estimated_time: str = "N/A"
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a recipe idea from model output, filling in missing fields"""
+        if not isinstance(data, dict) or not data.get("title"):
+            raise ValueError("Not a recipe idea")
+        return cls(
+            _text(data["title"]),
+            _text(data.get("description")),
+            _texts(data.get("ingredients_required")),
+            _texts(data.get("additional_ingredients_needed")),
+            _text(data.get("difficulty"), "N/A"),
+            _text(data.get("estimated_time"), "N/A"),
+        )
+
+    def to_dict(self):
+        return {
+            "title": self.title,
+            "description": self.description,
+            "ingredients_required": list(self.ingredients_required),
+            "additional_ingredients_needed": list(self.additional_ingredients_needed),
+            "difficulty": self.difficulty,
+            "estimated_time": self.estimated_time,
+        }
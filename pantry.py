@@ -0,0 +1,333 @@
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+
+# Maps free-text pantry input ("2 Chicken breasts", "chiken", "Garlic cloves")
+# to canonical ingredient IDs, so equivalent pantries produce the same
+# prompt, cache keys and index entries.
+
+# Canonical ID -> display name and extra aliases (the name is always an alias)
+LEXICON = {
+    # Meat, poultry and seafood
+    "chicken": ("Chicken", ["whole chicken", "poultry"]),
+    "chicken_breast": ("Chicken breast", ["chicken breast fillet", "chicken fillet"]),
+    "chicken_thigh": ("Chicken thigh", ["chicken thigh fillet"]),
+    "chicken_wing": ("Chicken wing", ["wing"]),
+    "ground_beef": ("Ground beef", ["minced beef", "beef mince", "hamburger meat"]),
+    "beef": ("Beef", ["beef steak", "steak", "stewing beef"]),
+    "pork": ("Pork", ["pork loin", "pork shoulder"]),
+    "pork_chop": ("Pork chop", []),
+    "ground_pork": ("Ground pork", ["minced pork", "pork mince"]),
+    "bacon": ("Bacon", ["streaky bacon", "bacon rasher"]),
+    "ham": ("Ham", []),
+    "sausage": ("Sausage", ["sausage link"]),
+    "lamb": ("Lamb", ["lamb chop", "ground lamb"]),
+    "turkey": ("Turkey", ["ground turkey", "turkey breast"]),
+    "salmon": ("Salmon", ["salmon fillet"]),
+    "tuna": ("Tuna", ["canned tuna", "tuna steak"]),
+    "cod": ("Cod", ["cod fillet", "white fish"]),
+    "shrimp": ("Shrimp", ["prawn", "king prawn"]),
+    # Dairy and eggs
+    "egg": ("Egg", ["eggs", "large egg"]),
+    "milk": ("Milk", ["whole milk", "skim milk"]),
+    "butter": ("Butter", ["unsalted butter", "salted butter"]),
+    "cream": ("Cream", ["heavy cream", "double cream", "whipping cream"]),
+    "sour_cream": ("Sour cream", []),
+    "yogurt": ("Yogurt", ["yoghurt", "greek yogurt", "plain yogurt"]),
+    "cheddar": ("Cheddar", ["cheddar cheese"]),
+    "mozzarella": ("Mozzarella", ["mozzarella cheese"]),
+    "parmesan": ("Parmesan", ["parmesan cheese", "parmigiano"]),
+    "feta": ("Feta", ["feta cheese"]),
+    "cheese": ("Cheese", []),
+    "cream_cheese": ("Cream cheese", []),
+    # Vegetables
+    "onion": ("Onion", ["yellow onion", "white onion", "brown onion"]),
+    "red_onion": ("Red onion", []),
+    "green_onion": ("Green onion", ["scallion", "spring onion"]),
+    "shallot": ("Shallot", []),
+    "garlic": ("Garlic", []),
+    "ginger": ("Ginger", ["ginger root", "fresh ginger"]),
+    "tomato": ("Tomato", ["tomatoe", "roma tomato", "plum tomato"]),
+    "cherry_tomato": ("Cherry tomato", []),
+    "canned_tomato": ("Canned tomato", ["tinned tomato"]),
+    "tomato_paste": ("Tomato paste", ["tomato puree"]),
+    "potato": ("Potato", ["russet potato", "yukon gold potato"]),
+    "sweet_potato": ("Sweet potato", ["yam"]),
+    "carrot": ("Carrot", []),
+    "celery": ("Celery", ["celery stalk", "celery stick"]),
+    "bell_pepper": ("Bell pepper", ["red pepper", "green pepper", "capsicum"]),
+    "chili_pepper": ("Chili pepper", ["chili", "chilli", "jalapeno", "red chili"]),
+    "broccoli": ("Broccoli", ["broccoli floret"]),
+    "cauliflower": ("Cauliflower", []),
+    "spinach": ("Spinach", ["baby spinach", "spinach leaf"]),
+    "kale": ("Kale", []),
+    "lettuce": ("Lettuce", ["romaine", "iceberg lettuce"]),
+    "cabbage": ("Cabbage", ["red cabbage"]),
+    "zucchini": ("Zucchini", ["courgette"]),
+    "eggplant": ("Eggplant", ["aubergine"]),
+    "cucumber": ("Cucumber", []),
+    "mushroom": ("Mushroom", ["button mushroom", "cremini", "portobello"]),
+    "corn": ("Corn", ["sweetcorn", "corn kernel"]),
+    "pea": ("Pea", ["green pea", "frozen pea"]),
+    "green_bean": ("Green bean", ["string bean"]),
+    "asparagus": ("Asparagus", []),
+    "avocado": ("Avocado", []),
+    "leek": ("Leek", []),
+    "pumpkin": ("Pumpkin", ["butternut squash", "squash"]),
+    # Fruit
+    "lemon": ("Lemon", ["lemon juice"]),
+    "lime": ("Lime", ["lime juice"]),
+    "orange": ("Orange", ["orange juice"]),
+    "apple": ("Apple", []),
+    "banana": ("Banana", []),
+    "strawberry": ("Strawberry", []),
+    "blueberry": ("Blueberry", []),
+    "mango": ("Mango", []),
+    "pineapple": ("Pineapple", []),
+    "raisin": ("Raisin", []),
+    # Grains, pasta and bread
+    "rice": ("Rice", ["white rice", "long grain rice", "jasmine rice", "basmati rice"]),
+    "brown_rice": ("Brown rice", []),
+    "pasta": ("Pasta", ["penne", "fusilli", "macaroni", "rigatoni"]),
+    "spaghetti": ("Spaghetti", ["linguine", "fettuccine"]),
+    "noodle": ("Noodle", ["egg noodle", "rice noodle", "ramen"]),
+    "bread": ("Bread", ["white bread", "sourdough", "loaf"]),
+    "tortilla": ("Tortilla", ["wrap", "flour tortilla", "corn tortilla"]),
+    "flour": ("Flour", ["all purpose flour", "plain flour", "wheat flour"]),
+    "oat": ("Oats", ["rolled oat", "oatmeal"]),
+    "quinoa": ("Quinoa", []),
+    "couscous": ("Couscous", []),
+    "breadcrumb": ("Breadcrumbs", ["panko"]),
+    # Legumes, nuts and seeds
+    "chickpea": ("Chickpeas", ["garbanzo bean", "garbanzo"]),
+    "black_bean": ("Black beans", []),
+    "kidney_bean": ("Kidney beans", ["red kidney bean"]),
+    "lentil": ("Lentils", ["red lentil", "green lentil"]),
+    "tofu": ("Tofu", ["firm tofu", "silken tofu", "bean curd"]),
+    "peanut": ("Peanuts", []),
+    "peanut_butter": ("Peanut butter", []),
+    "almond": ("Almonds", []),
+    "walnut": ("Walnuts", []),
+    "cashew": ("Cashews", []),
+    "sesame_seed": ("Sesame seeds", ["sesame"]),
+    # Oils, sauces and condiments
+    "olive_oil": ("Olive oil", ["extra virgin olive oil", "evoo"]),
+    "vegetable_oil": ("Vegetable oil", ["canola oil", "sunflower oil", "cooking oil", "oil"]),
+    "sesame_oil": ("Sesame oil", []),
+    "soy_sauce": ("Soy sauce", ["soya sauce", "tamari", "shoyu"]),
+    "fish_sauce": ("Fish sauce", []),
+    "oyster_sauce": ("Oyster sauce", []),
+    "vinegar": ("Vinegar", ["white vinegar", "rice vinegar", "apple cider vinegar"]),
+    "balsamic_vinegar": ("Balsamic vinegar", ["balsamic"]),
+    "mustard": ("Mustard", ["dijon mustard", "dijon"]),
+    "ketchup": ("Ketchup", ["tomato ketchup"]),
+    "mayonnaise": ("Mayonnaise", ["mayo"]),
+    "hot_sauce": ("Hot sauce", ["sriracha", "tabasco"]),
+    "honey": ("Honey", []),
+    "maple_syrup": ("Maple syrup", []),
+    "stock": ("Stock", ["broth", "chicken stock", "vegetable stock", "beef stock", "chicken broth"]),
+    "coconut_milk": ("Coconut milk", []),
+    "salsa": ("Salsa", []),
+    "pesto": ("Pesto", []),
+    # Baking and pantry staples
+    "sugar": ("Sugar", ["white sugar", "granulated sugar", "caster sugar"]),
+    "brown_sugar": ("Brown sugar", []),
+    "baking_powder": ("Baking powder", []),
+    "baking_soda": ("Baking soda", ["bicarbonate of soda"]),
+    "yeast": ("Yeast", ["dry yeast"]),
+    "cornstarch": ("Cornstarch", ["cornflour", "corn starch"]),
+    "chocolate": ("Chocolate", ["dark chocolate", "chocolate chip"]),
+    "cocoa": ("Cocoa powder", ["cocoa"]),
+    "vanilla": ("Vanilla extract", ["vanilla"]),
+    # Herbs and spices
+    "salt": ("Salt", ["sea salt", "kosher salt"]),
+    "black_pepper": ("Black pepper", ["ground pepper", "peppercorn", "ground black pepper"]),
+    "basil": ("Basil", []),
+    "parsley": ("Parsley", ["flat leaf parsley"]),
+    "cilantro": ("Cilantro", ["coriander leaf"]),
+    "mint": ("Mint", []),
+    "rosemary": ("Rosemary", []),
+    "thyme": ("Thyme", []),
+    "oregano": ("Oregano", []),
+    "dill": ("Dill", []),
+    "bay_leaf": ("Bay leaf", []),
+    "cumin": ("Cumin", ["ground cumin", "cumin seed"]),
+    "coriander": ("Coriander", ["ground coriander"]),
+    "paprika": ("Paprika", ["smoked paprika"]),
+    "chili_powder": ("Chili powder", ["chilli powder", "cayenne", "chili flake", "red pepper flake"]),
+    "turmeric": ("Turmeric", []),
+    "cinnamon": ("Cinnamon", []),
+    "nutmeg": ("Nutmeg", []),
+    "curry_powder": ("Curry powder", ["curry paste", "garam masala"]),
+    "italian_seasoning": ("Italian seasoning", ["mixed herb", "dried herb"]),
+}
+
+UNITS = {
+    "cup", "tablespoon", "tbsp", "tbs", "teaspoon", "tsp", "g", "gram", "kg", "kilogram",
+    "mg", "ml", "l", "liter", "litre", "oz", "ounce", "lb", "pound", "pinch", "dash",
+    "handful", "bunch", "can", "tin", "jar", "bag", "box", "packet", "package", "pack",
+    "slice", "piece", "head", "clove", "sprig", "stick", "stalk", "bottle", "carton", "dozen",
+}
+
+DESCRIPTORS = {
+    "fresh", "frozen", "dried", "raw", "cooked", "chopped", "diced", "sliced",
+    "grated", "shredded", "crushed", "peeled", "large", "small", "medium",
+    "boneless", "skinless", "ripe", "organic", "leftover", "about", "some", "of", "a",
+    "an", "few", "whole", "optional", "to", "taste", "finely", "roughly", "and", "or",
+}
+
+# Words that look plural but are not
+SINGULAR_EXCEPTIONS = {"asparagus", "couscous", "hummus", "molasses", "swiss", "bass", "grass", "oats"}
+# Plurals in -ves whose singular ends in -f or -fe ("cloves" is just "clove")
+IRREGULAR_PLURALS = {
+    "leaves": "leaf", "loaves": "loaf", "halves": "half", "calves": "calf",
+    "knives": "knife", "shelves": "shelf", "wolves": "wolf",
+}
+
+# A fuzzy match must be a near-miss spelling of a known alias: high trigram
+# similarity and about the same length, so "chiken" matches but "wine" is
+# not taken for "wing" nor "peanut oil" for "peanut"
+FUZZY_THRESHOLD = 0.65
+MIN_LENGTH_RATIO = 0.75
+
+_QUANTITY_RE = re.compile(r"^[\d\s/.,\-½⅓⅔¼¾⅛]+(?:x\s+)?")
+_PAREN_RE = re.compile(r"\([^)]*\)")
+_NON_WORD_RE = re.compile(r"[^a-z\s]")
+# Separators between several items on one line ("salt and pepper")
+_SPLIT_RE = re.compile(r"[,;&+]|\band\b", re.IGNORECASE)
+
+
+def singularize(word):
+    """Crude English singular form of a single word"""
+    if word in SINGULAR_EXCEPTIONS or len(word) <= 3:
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith("oes"):
+        return word[:-2]
+    if word in IRREGULAR_PLURALS:
+        return IRREGULAR_PLURALS[word]
+    if word.endswith(("ches", "shes", "sses", "xes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us")):
+        return word[:-1]
+    return word
+
+
+def normalize(text):
+    """Lowercase and strip quantities, units, descriptors and plurals"""
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    text = _PAREN_RE.sub(" ", text.lower())
+    text = _QUANTITY_RE.sub("", text.strip())
+    words = [singularize(word) for word in _NON_WORD_RE.sub(" ", text).split()]
+    kept = [word for word in words if word not in UNITS and word not in DESCRIPTORS]
+    # Keep the original words if stripping would leave nothing ("a pinch of salt" keeps "salt")
+    return " ".join(kept or words)
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class Canonicalizer:
+    """Exact alias lookup with a trigram-index fuzzy fallback"""
+
+    def __init__(self, lexicon=LEXICON):
+        self.names = {}
+        self.aliases = {}
+        self._alias_trigrams = {}
+        self._index = defaultdict(set)
+        for ingredient_id, (name, aliases) in lexicon.items():
+            self.names[ingredient_id] = name
+            for alias in [name, *aliases]:
+                key = normalize(alias)
+                self.aliases.setdefault(key, ingredient_id)
+        for key in self.aliases:
+            grams = _trigrams(key)
+            self._alias_trigrams[key] = grams
+            for gram in grams:
+                self._index[gram].add(key)
+        self._memo = {}
+
+    def _fuzzy(self, key):
+        grams = _trigrams(key)
+        overlap = defaultdict(int)
+        for gram in grams:
+            for candidate in self._index.get(gram, ()):
+                overlap[candidate] += 1
+        best_key, best_score = None, 0.0
+        for candidate, shared in overlap.items():
+            if min(len(key), len(candidate)) / max(len(key), len(candidate)) < MIN_LENGTH_RATIO:
+                continue
+            # Dice coefficient over trigram sets
+            score = 2 * shared / (len(grams) + len(self._alias_trigrams[candidate]))
+            if score > best_score or (score == best_score and best_key and len(candidate) < len(best_key)):
+                best_key, best_score = candidate, score
+        if best_score >= FUZZY_THRESHOLD:
+            return best_key, best_score
+        return None, best_score
+
+    def canonicalize(self, text):
+        """Map one free-text item to {"input", "id", "name", "score"}
+
+        Unknown items keep the user's own text as the name and have id None.
+        """
+        key = normalize(text)
+        cached = self._memo.get(key)
+        if cached is None:
+            if key in self.aliases:
+                cached = (self.aliases[key], 1.0)
+            else:
+                match, score = self._fuzzy(key) if key else (None, 0.0)
+                cached = (self.aliases[match] if match else None, score)
+            if len(self._memo) < 10000:
+                self._memo[key] = cached
+        ingredient_id, score = cached
+        return {
+            "input": text,
+            "id": ingredient_id,
+            "name": self.names[ingredient_id] if ingredient_id else " ".join(text.split()),
+            "score": round(score, 3),
+        }
+
+
+_canonicalizer = None
+_canonicalizer_lock = threading.Lock()
+
+
+def get_canonicalizer():
+    """Return the process-wide canonicalizer built from the bundled lexicon"""
+    global _canonicalizer
+    if _canonicalizer is None:
+        with _canonicalizer_lock:
+            if _canonicalizer is None:
+                _canonicalizer = Canonicalizer()
+    return _canonicalizer
+
+
+def canonicalize(items):
+    """Canonicalize a list of free-text items, dropping blanks and duplicates
+
+    A line naming several items ("salt and pepper") is split into each item.
+    """
+    canonicalizer = get_canonicalizer()
+    seen = set()
+    matches = []
+    for line in items:
+        for item in _SPLIT_RE.split(line):
+            if not item.strip():
+                continue
+            match = canonicalizer.canonicalize(item)
+            key = match["id"] or match["name"].lower()
+            if key not in seen:
+                seen.add(key)
+                matches.append(match)
+    return matches
+
+
+def canonical_names(items):
+    """Sorted canonical display names, so equivalent pantries give identical prompts"""
+    return sorted(match["name"] for match in canonicalize(items) if match["name"])
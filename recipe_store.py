@@ -0,0 +1,262 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import zlib
+
+import models
+import storage
+
+# Recipe bodies are stored once, compressed, under their content hash.
+# Per-user history entries only keep a reference to that hash.
+# Valid recipes are stored in Recipe's versioned compact form; anything
+# else (e.g. error payloads) is stored as the original JSON object.
+BLOBS_DIRNAME = "_blobs"
+COMPRESSION_LEVEL = 9
+
+# Every stored recipe is also listed in a search index, so a similar recipe
+# can be served while the model is unavailable
+INDEX = "recipes/_index"
+# Seconds a loaded copy of the index is reused before it is re-read
+INDEX_CACHE_TTL = 60
+# Fraction of the query's words a recipe must contain to count as similar
+MIN_SIMILARITY = 0.3
+
+_index_cache = {"loaded_at": None, "entries": []}
+_index_lock = threading.Lock()
+
+
+def canonical_json(recipe_data):
+    """Serialize a recipe to a stable, compact JSON string"""
+    return json.dumps(recipe_data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def _serialize(recipe_data):
+    """Return (content hash, stored JSON) for a recipe body"""
+    try:
+        body = canonical_json(models.Recipe.from_dict(recipe_data).to_compact())
+    except ValueError:
+        body = canonical_json(recipe_data)
+    return hashlib.sha256(body.encode("utf-8")).hexdigest(), body
+
+
+def recipe_hash(recipe_data):
+    """Content hash of a recipe body"""
+    return _serialize(recipe_data)[0]
+
+
+def _blob_key(digest):
+    return f"recipes/{BLOBS_DIRNAME}/{digest[:2]}/{digest}.json.z"
+
+
+def history_name(user_email):
+    """Name of the history list for a user"""
+    return f"recipes/{user_email.replace('@', '_at_')}"
+
+
+def _words(text):
+    return {word for word in re.findall(r"[a-z]+", text.lower()) if len(word) > 2}
+
+
+def _index_text(recipe):
+    return " ".join((recipe.title, recipe.description, *recipe.ingredients))
+
+
+def put_recipe(recipe_data, backend=None):
+    """Store a recipe body once and return its content hash"""
+    backend = backend or storage.get_backend()
+    digest, body = _serialize(recipe_data)
+    key = _blob_key(digest)
+    if backend.get(key) is None and \
+            backend.setnx(key, zlib.compress(body.encode("utf-8"), COMPRESSION_LEVEL)):
+        try:
+            recipe = models.Recipe.from_dict(recipe_data)
+        except ValueError:
+            pass
+        else:
+            backend.rpush(INDEX, {"recipe_hash": digest, "text": _index_text(recipe)})
+    return digest
+
+
+def load_recipe(digest, backend=None):
+    """Load a stored body as a Recipe, or as the raw dict if it is not a recipe"""
+    backend = backend or storage.get_backend()
+    stored = json.loads(zlib.decompress(backend.get(_blob_key(digest))).decode("utf-8"))
+    if isinstance(stored, list):
+        return models.Recipe.from_compact(stored)
+    return stored
+
+
+def get_recipe(digest, backend=None):
+    """Load a recipe body by its content hash"""
+    recipe = load_recipe(digest, backend)
+    return recipe.to_dict() if isinstance(recipe, models.Recipe) else recipe
+
+
+def _load_index(backend):
+    now = time.monotonic()
+    with _index_lock:
+        if _index_cache["loaded_at"] is not None and now - _index_cache["loaded_at"] < INDEX_CACHE_TTL:
+            return _index_cache["entries"]
+    entries = [(item["recipe_hash"], _words(item["text"])) for item in backend.lrange(INDEX)]
+    with _index_lock:
+        _index_cache["loaded_at"] = now
+        _index_cache["entries"] = entries
+    return entries
+
+
+def find_similar(query, backend=None):
+    """Return the stored Recipe that best matches a free-text request, or None
+
+    Recipes are ranked by the share of the query's words they contain, with
+    ties broken by Jaccard similarity so shorter, closer recipes win.
+    """
+    backend = backend or storage.get_backend()
+    query_words = _words(query)
+    if not query_words:
+        return None
+    best_score, best_digest = (MIN_SIMILARITY, 0.0), None
+    for digest, words in _load_index(backend):
+        common = len(query_words & words)
+        score = (common / len(query_words), common / len(query_words | words))
+        if score >= best_score:
+            best_score, best_digest = score, digest
+    return load_recipe(best_digest, backend) if best_digest else None
+
+
+def make_entry(prompt, digest, created_at, parent_hash=None):
+    """Build a history entry that references a stored recipe body
+
+    Modified recipes also reference the recipe they were derived from.
+    """
+    entry = {
+        "prompt": prompt,
+        "recipe_hash": digest,
+        "created_at": created_at
+    }
+    if parent_hash:
+        entry["parent_hash"] = parent_hash
+    return entry
+
+
+def resolve_entry(entry, backend=None):
+    """Attach the Recipe referenced by a history entry, or None if it is not a recipe"""
+    if "recipe_hash" in entry:
+        try:
+            recipe = load_recipe(entry["recipe_hash"], backend)
+        except (TypeError, ValueError, zlib.error) as e:
+            # A missing or unreadable blob hides this entry rather than the whole history
+            print(f"Error loading recipe {entry['recipe_hash']}: {e}")
+            recipe = None
+    else:
+        # Legacy entries carry the recipe body inline
+        recipe = entry.pop("recipe_data", None)
+    if not isinstance(recipe, models.Recipe):
+        try:
+            recipe = models.Recipe.from_dict(recipe)
+        except ValueError:
+            recipe = None
+    entry["recipe"] = recipe
+    return entry
+
+
+def compact(data_dir="data", dry_run=False):
+    """Convert inline history entries to hash references and report bytes saved
+
+    Legacy inline entries only exist in the local filesystem layout, so this
+    always works on a data directory rather than the configured backend.
+    """
+    backend = storage.FileBackend(data_dir)
+    recipes_dir = os.path.join(data_dir, "recipes")
+    report = {
+        "entries_scanned": 0,
+        "entries_converted": 0,
+        "unique_recipes": 0,
+        "bytes_before": 0,
+        "bytes_after": 0,
+        "bytes_saved": 0,
+    }
+    if not os.path.isdir(recipes_dir):
+        return report
+
+    new_blobs = {}
+    for user_dir in sorted(os.listdir(recipes_dir)):
+        user_path = os.path.join(recipes_dir, user_dir)
+        # Blobs and the search index live beside user histories under "_" names
+        if user_dir.startswith("_") or not os.path.isdir(user_path):
+            continue
+        for filename in sorted(os.listdir(user_path)):
+            if not filename.endswith('.json'):
+                continue
+            filepath = os.path.join(user_path, filename)
+            size = os.path.getsize(filepath)
+            report["entries_scanned"] += 1
+            report["bytes_before"] += size
+
+            with open(filepath, 'r') as f:
+                entry = json.load(f)
+            if "recipe_data" not in entry:
+                report["bytes_after"] += size
+                continue
+
+            recipe_data = entry["recipe_data"]
+            digest, body = _serialize(recipe_data)
+            if digest not in new_blobs and backend.get(_blob_key(digest)) is None:
+                new_blobs[digest] = len(zlib.compress(body.encode("utf-8"), COMPRESSION_LEVEL))
+            else:
+                new_blobs.setdefault(digest, 0)
+
+            reference = json.dumps(
+                make_entry(entry.get("prompt", ""), digest, entry.get("created_at", "")),
+                separators=(",", ":"), ensure_ascii=False
+            ).encode("utf-8")
+            report["bytes_after"] += len(reference)
+            report["entries_converted"] += 1
+
+            if not dry_run:
+                put_recipe(recipe_data, backend)
+                backend.set(f"recipes/{user_dir}/{filename}", reference)
+
+    report["unique_recipes"] = len(new_blobs)
+    report["bytes_after"] += sum(new_blobs.values())
+    report["bytes_saved"] = report["bytes_before"] - report["bytes_after"]
+    return report
+
+
+def reindex(data_dir="data"):
+    """Rebuild the search index from every recipe body in a data directory"""
+    backend = storage.FileBackend(data_dir)
+    index_dir = os.path.join(data_dir, *INDEX.split("/"))
+    if os.path.isdir(index_dir):
+        for filename in os.listdir(index_dir):
+            os.remove(os.path.join(index_dir, filename))
+
+    indexed = 0
+    blobs_dir = os.path.join(data_dir, "recipes", BLOBS_DIRNAME)
+    for dirpath, _, filenames in sorted(os.walk(blobs_dir)):
+        for filename in sorted(filenames):
+            if not filename.endswith(".json.z"):
+                continue
+            digest = filename[:-len(".json.z")]
+            recipe = load_recipe(digest, backend)
+            if isinstance(recipe, models.Recipe):
+                backend.rpush(INDEX, {"recipe_hash": digest, "text": _index_text(recipe)})
+                indexed += 1
+    return {"recipes_indexed": indexed}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain content-addressed recipe storage")
+    parser.add_argument("command", choices=["compact", "reindex"])
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--dry-run", action="store_true", help="Only report the bytes that would be saved")
+    args = parser.parse_args()
+
+    if args.command == "reindex":
+        report = reindex(args.data_dir)
+    else:
+        report = compact(args.data_dir, dry_run=args.dry_run)
+    print(json.dumps(report, indent=2))
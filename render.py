@@ -0,0 +1,63 @@
+import threading
+from collections import OrderedDict
+
+# Rendered recipes are memoized by content, so reruns of a long Recipe
+# History page reuse the markup instead of rebuilding it.
+RENDER_CACHE_SIZE = 2048
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _build(recipe):
+    """Turn a Recipe into its display blocks in a single pass"""
+    nutrition = recipe.nutrition_info
+    header = (
+        f"<h2>{recipe.title}</h2>"
+        f"<p><i>{recipe.description}</i></p>"
+    )
+    details = (
+        "### Details\n"
+        f"**Prep Time:** {recipe.prep_time}  \n"
+        f"**Cook Time:** {recipe.cook_time}  \n"
+        f"**Servings:** {recipe.servings}"
+    )
+    nutrition_info = (
+        "### Nutrition Information\n"
+        f"**Calories:** {nutrition.calories}  \n"
+        f"**Protein:** {nutrition.protein}  \n"
+        f"**Carbs:** {nutrition.carbs}  \n"
+        f"**Fat:** {nutrition.fat}"
+    )
+
+    lines = ["### Ingredients"]
+    lines.extend(f"- {ingredient}" for ingredient in recipe.ingredients)
+    lines.append("")
+    lines.append("### Instructions")
+    lines.extend(f"{i}. {step}" for i, step in enumerate(recipe.instructions, 1))
+    lines.append("")
+    lines.append("### Shopping List")
+    lines.extend(f"- {item}" for item in recipe.shopping_list)
+
+    return header, details, nutrition_info, "\n".join(lines)
+
+
+def render_recipe(recipe, recipe_hash=None):
+    """Return (header_html, details_md, nutrition_md, body_md) for a Recipe
+
+    Pass the recipe's content hash when it is already known (history entries
+    carry it); otherwise the immutable Recipe itself is the cache key.
+    """
+    key = recipe_hash or recipe
+    with _cache_lock:
+        blocks = _cache.get(key)
+        if blocks is not None:
+            _cache.move_to_end(key)
+            return blocks
+
+    blocks = _build(recipe)
+    with _cache_lock:
+        _cache[key] = blocks
+        if len(_cache) > RENDER_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return blocks
@@ -0,0 +1,119 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+import storage
+
+# Signed, expiring session tokens. A token carries the user's email and name,
+# so a browser refresh or websocket reconnect restores the session without
+# touching the user store; validated tokens are kept in an in-process cache.
+SESSION_TTL = int(os.getenv("SESSION_TTL", str(7 * 24 * 3600)))
+# How long a validated token is trusted before revocations are re-checked
+SESSION_CACHE_TTL = int(os.getenv("SESSION_CACHE_TTL", "60"))
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "10000"))
+
+# Names in the shared state backend
+SECRET_KEY = "secrets/session_secret"
+REVOKED = "revoked_sessions"
+
+_secret = None
+_secret_lock = threading.Lock()
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _get_secret():
+    """Signing key from SESSION_SECRET, or one generated once and shared through the backend"""
+    global _secret
+    if _secret is None:
+        with _secret_lock:
+            if _secret is None:
+                env_secret = os.getenv("SESSION_SECRET")
+                if env_secret:
+                    _secret = env_secret.encode()
+                else:
+                    backend = storage.get_backend()
+                    backend.setnx(SECRET_KEY, secrets.token_bytes(32))
+                    _secret = backend.get(SECRET_KEY)
+    return _secret
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(payload):
+    return _b64encode(hmac.new(_get_secret(), payload.encode("ascii"), hashlib.sha256).digest())
+
+
+def create_session(email, name, ttl=SESSION_TTL):
+    """Issue a signed session token for a user"""
+    claims = {"sub": email, "name": name, "exp": int(time.time()) + ttl, "jti": secrets.token_urlsafe(12)}
+    payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+    return f"{payload}.{_sign(payload)}"
+
+
+def _decode(token):
+    # Tokens arrive from URLs and headers, so anything malformed (including
+    # non-ASCII text, a UnicodeEncodeError) is simply invalid
+    try:
+        payload, signature = token.split(".")
+        if not hmac.compare_digest(signature.encode("ascii"), _sign(payload).encode("ascii")):
+            return None
+        claims = json.loads(_b64decode(payload))
+    except (AttributeError, ValueError):
+        return None
+    return claims if isinstance(claims, dict) else None
+
+
+def validate(token):
+    """Return {"email", "name"} for a valid, unexpired, unrevoked token, else None"""
+    now = time.time()
+    with _cache_lock:
+        cached = _cache.get(token)
+        if cached is not None:
+            session, cached_until = cached
+            if now < cached_until:
+                _cache.move_to_end(token)
+                return session
+            del _cache[token]
+
+    claims = _decode(token)
+    if claims is None or claims.get("exp", 0) <= now:
+        return None
+    if storage.get_backend().hget(REVOKED, claims["jti"]) is not None:
+        return None
+
+    session = {"email": claims["sub"], "name": claims.get("name")}
+    with _cache_lock:
+        _cache[token] = (session, min(claims["exp"], now + SESSION_CACHE_TTL))
+        while len(_cache) > SESSION_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return session
+
+
+def revoke(token):
+    """Revoke a session token on every worker sharing the backend"""
+    with _cache_lock:
+        _cache.pop(token, None)
+    claims = _decode(token)
+    if claims is None:
+        return
+    backend = storage.get_backend()
+    backend.hset(REVOKED, claims["jti"], claims["exp"])
+
+    # Drop revocations for tokens that have expired anyway
+    now = time.time()
+    for jti, exp in backend.hgetall(REVOKED).items():
+        if exp <= now:
+            backend.hdel(REVOKED, jti)
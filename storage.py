@@ -0,0 +1,295 @@
+import fcntl
+import itertools
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+# Shared state (users, recipe history, caches) goes through one of these
+# interchangeable backends so several app workers can share it.
+#
+# Every backend exposes the same three shapes of data:
+#   - hashes: name -> {field: JSON value}   (user store)
+#   - lists:  name -> [JSON value, ...]     (recipe history)
+#   - keys:   key -> bytes                  (recipe blobs, caches)
+
+
+# Distinguishes list items pushed by one process within the same microsecond
+_push_sequence = itertools.count()
+
+
+class FileBackend:
+    """Local filesystem backend using file locks, compatible with the data/ layout"""
+
+    def __init__(self, root="data"):
+        self.root = root
+
+    def _path(self, name):
+        return os.path.join(self.root, *name.split("/"))
+
+    @contextmanager
+    def _locked(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(f"{path}.lock", 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write_atomic(self, path, data):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _read_hash(self, path):
+        if not os.path.exists(path):
+            return {}
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def _write_hash(self, path, values):
+        self._write_atomic(path, json.dumps(values, indent=4).encode("utf-8"))
+
+    def hget(self, name, field):
+        return self._read_hash(self._path(f"{name}.json")).get(field)
+
+    def hgetall(self, name):
+        return self._read_hash(self._path(f"{name}.json"))
+
+    def hset(self, name, field, value):
+        path = self._path(f"{name}.json")
+        with self._locked(path):
+            values = self._read_hash(path)
+            values[field] = value
+            self._write_hash(path, values)
+
+    def hsetnx(self, name, field, value):
+        path = self._path(f"{name}.json")
+        with self._locked(path):
+            values = self._read_hash(path)
+            if field in values:
+                return False
+            values[field] = value
+            self._write_hash(path, values)
+            return True
+
+    def hdel(self, name, field):
+        path = self._path(f"{name}.json")
+        with self._locked(path):
+            values = self._read_hash(path)
+            if values.pop(field, None) is not None:
+                self._write_hash(path, values)
+
+    def rpush(self, name, value):
+        # One file per item, named so that lexical order is insertion order
+        filename = datetime.now().strftime("%Y%m%d_%H%M%S_%f") + \
+            f"_{os.getpid()}_{next(_push_sequence):010d}.json"
+        data = json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        self._write_atomic(os.path.join(self._path(name), filename), data)
+
+    def lrange(self, name):
+        list_dir = self._path(name)
+        if not os.path.isdir(list_dir):
+            return []
+        items = []
+        for filename in sorted(os.listdir(list_dir)):
+            if filename.endswith('.json'):
+                with open(os.path.join(list_dir, filename), 'r') as f:
+                    items.append(json.load(f))
+        return items
+
+    def get(self, key):
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def set(self, key, value):
+        self._write_atomic(self._path(key), value)
+
+    def setnx(self, key, value):
+        path = self._path(key)
+        if os.path.exists(path):
+            return False
+        tmp_path = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            f.write(value)
+        try:
+            # link() fails if another worker created the key first
+            os.link(tmp_path, path)
+            return True
+        except FileExistsError:
+            return False
+        finally:
+            os.remove(tmp_path)
+
+
+class SQLiteBackend:
+    """SQLite backend in WAL mode, shared by all workers on one machine"""
+
+    def __init__(self, path="data/state.db"):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS hashes (
+                name TEXT NOT NULL, field TEXT NOT NULL, value TEXT NOT NULL,
+                PRIMARY KEY (name, field)
+            );
+            CREATE TABLE IF NOT EXISTS lists (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, value TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS lists_name ON lists (name, id);
+            CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value BLOB NOT NULL);
+        """)
+
+    def _conn(self):
+        # sqlite3 connections cannot be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def hget(self, name, field):
+        row = self._conn().execute(
+            "SELECT value FROM hashes WHERE name = ? AND field = ?", (name, field)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def hgetall(self, name):
+        rows = self._conn().execute("SELECT field, value FROM hashes WHERE name = ?", (name,))
+        return {field: json.loads(value) for field, value in rows}
+
+    def hset(self, name, field, value):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO hashes (name, field, value) VALUES (?, ?, ?)",
+            (name, field, json.dumps(value))
+        )
+
+    def hsetnx(self, name, field, value):
+        cursor = self._conn().execute(
+            "INSERT OR IGNORE INTO hashes (name, field, value) VALUES (?, ?, ?)",
+            (name, field, json.dumps(value))
+        )
+        return cursor.rowcount == 1
+
+    def hdel(self, name, field):
+        self._conn().execute("DELETE FROM hashes WHERE name = ? AND field = ?", (name, field))
+
+    def rpush(self, name, value):
+        self._conn().execute(
+            "INSERT INTO lists (name, value) VALUES (?, ?)",
+            (name, json.dumps(value, separators=(",", ":")))
+        )
+
+    def lrange(self, name):
+        rows = self._conn().execute("SELECT value FROM lists WHERE name = ? ORDER BY id", (name,))
+        return [json.loads(value) for (value,) in rows]
+
+    def get(self, key):
+        row = self._conn().execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+        return bytes(row[0]) if row else None
+
+    def set(self, key, value):
+        self._conn().execute("INSERT OR REPLACE INTO kv (key, value) VALUES (?, ?)", (key, value))
+
+    def setnx(self, key, value):
+        cursor = self._conn().execute("INSERT OR IGNORE INTO kv (key, value) VALUES (?, ?)", (key, value))
+        return cursor.rowcount == 1
+
+
+class RedisBackend:
+    """Redis-protocol backend for workers spread across machines"""
+
+    def __init__(self, url="redis://localhost:6379/0", client=None, prefix="ai-cooking:"):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise ValueError("The redis package is required for STATE_BACKEND=redis")
+            client = redis.Redis.from_url(url)
+        # Any client speaking the redis-py API works, e.g. a local stand-in server
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, name):
+        return f"{self.prefix}{name}"
+
+    def hget(self, name, field):
+        value = self.client.hget(self._key(name), field)
+        return json.loads(value) if value is not None else None
+
+    def hgetall(self, name):
+        values = self.client.hgetall(self._key(name))
+        return {
+            (field.decode() if isinstance(field, bytes) else field): json.loads(value)
+            for field, value in values.items()
+        }
+
+    def hset(self, name, field, value):
+        self.client.hset(self._key(name), field, json.dumps(value))
+
+    def hsetnx(self, name, field, value):
+        return bool(self.client.hsetnx(self._key(name), field, json.dumps(value)))
+
+    def hdel(self, name, field):
+        self.client.hdel(self._key(name), field)
+
+    def rpush(self, name, value):
+        self.client.rpush(self._key(name), json.dumps(value, separators=(",", ":")))
+
+    def lrange(self, name):
+        return [json.loads(value) for value in self.client.lrange(self._key(name), 0, -1)]
+
+    def get(self, key):
+        return self.client.get(self._key(key))
+
+    def set(self, key, value):
+        self.client.set(self._key(key), value)
+
+    def setnx(self, key, value):
+        return bool(self.client.set(self._key(key), value, nx=True))
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(kind=None, url=None):
+    """Create a backend from explicit settings or the STATE_BACKEND/STATE_URL environment"""
+    kind = kind or os.getenv("STATE_BACKEND", "file")
+    url = url or os.getenv("STATE_URL")
+    if kind == "file":
+        return FileBackend(url or "data")
+    if kind == "sqlite":
+        return SQLiteBackend(url or "data/state.db")
+    if kind == "redis":
+        return RedisBackend(url or "redis://localhost:6379/0")
+    raise ValueError(f"Unknown STATE_BACKEND: {kind}")
+
+
+def get_backend():
+    """Return the process-wide shared state backend"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend()
+    return _backend
+
+
+def set_backend(backend):
+    """Replace the process-wide backend (e.g. to point workers at a stand-in server)"""
+    global _backend
+    _backend = backend
@@ -0,0 +1,85 @@
+import json
+
+import pytest
+from tornado.testing import AsyncHTTPTestCase
+
+import api
+import auth
+import circuit_breaker
+import gemini_utils
+import model_stub
+import sessions
+import storage
+
+
+@pytest.fixture(autouse=True)
+def app_state(monkeypatch, tmp_path):
+    """Empty store, stand-in model with no delay and a signed-in user"""
+    monkeypatch.setenv("GEMINI_BACKEND", "stub")
+    monkeypatch.setenv("SESSION_SECRET", "test-secret")
+    monkeypatch.setattr(sessions, "_secret", None)
+    monkeypatch.setattr(model_stub, "DEFAULT_LATENCY", 0)
+    monkeypatch.setattr(gemini_utils, "breaker", circuit_breaker.CircuitBreaker("gemini"))
+    previous = storage._backend
+    storage.set_backend(storage.FileBackend(str(tmp_path / "data")))
+    auth.add_user("cook@example.com", {"name": "Cook", "password_hash": auth.hash_password("secret")})
+    yield
+    storage.set_backend(previous)
+
+
+class RecipeAPITest(AsyncHTTPTestCase):
+    def get_app(self):
+        return api.make_app()
+
+    def post(self, path, body):
+        token = sessions.create_session("cook@example.com", "Cook")
+        return self.fetch(path, method="POST", body=json.dumps(body), headers={"Authorization": f"Bearer {token}"})
+
+    def test_recipe_request_validation(self):
+        bad_bodies = [
+            {},
+            {"preferences": ""},
+            {"preferences": ["pasta"]},
+            {"preferences": "pasta", "dietary_restrictions": 5},
+            {"preferences": "pasta", "dietary_restrictions": "Vegan"},
+            {"preferences": "pasta", "dietary_restrictions": ["Vegan", 1]},
+            {"preferences": "pasta", "servings": "2"},
+            {"preferences": "pasta", "servings": 0},
+            {"preferences": "pasta", "servings": 21},
+            {"preferences": "pasta", "servings": True},
+            {"preferences": "pasta", "additional_info": None},
+        ]
+        for body in bad_bodies:
+            assert self.post("/api/recipes", body).code == 400, body
+
+        response = self.post("/api/recipes", {"preferences": "pasta", "dietary_restrictions": ["Vegan"], "servings": 4})
+        assert response.code == 200
+        assert json.loads(response.body)["title"] == "Stand-in pasta"
+
+    def test_recipe_ideas_validation(self):
+        for body in [
+            {"ingredients": "chicken, rice"},
+            {"ingredients": ["chicken", 3]},
+            {"ingredients": ["chicken"], "dietary_restrictions": 5},
+            {"ingredients": ["chicken"], "servings": 50},
+        ]:
+            assert self.post("/api/recipe-ideas", body).code == 400, body
+
+        response = self.post("/api/recipe-ideas", {"ingredients": ["chicken and rice"]})
+        assert response.code == 200
+        assert len(json.loads(response.body)["recipe_ideas"]) == 3
+
+    def test_batch_validation(self):
+        for body in [
+            {"requests": []},
+            {"requests": "pasta"},
+            {"requests": ["pasta"]},
+            {"requests": [{"preferences": "a", "dietary_restrictions": 5}]},
+            {"requests": [{"preferences": "a"}, {"preferences": ""}]},
+            {"requests": [{"preferences": f"dish {i}"} for i in range(gemini_utils.MAX_BATCH_SIZE + 1)]},
+        ]:
+            assert self.post("/api/recipes/batch", body).code == 400, body
+
+        response = self.post("/api/recipes/batch", {"requests": [{"preferences": "a"}, {"preferences": "b"}]})
+        assert response.code == 200
+        assert [recipe["title"] for recipe in json.loads(response.body)["recipes"]] == ["Stand-in a", "Stand-in b"]
@@ -0,0 +1,102 @@
+import json
+import re
+
+import pytest
+
+import circuit_breaker
+import gemini_utils
+import model_stub
+
+ERROR = {"error": "Failed to generate recipe. Please try again."}
+
+
+class ScriptedModel:
+    """Returns one scripted reply per call and records the prompts it was sent"""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.prompts = []
+
+    def generate_content(self, prompt):
+        self.prompts.append(prompt)
+        reply = self.replies.pop(0)
+        text = reply if isinstance(reply, str) else "```json\n" + json.dumps(reply) + "\n```"
+        return model_stub.StubResponse(text, prompt)
+
+
+def recipe(preferences, number=None):
+    item = model_stub.fake_recipe(preferences, 2)
+    if number is not None:
+        item["request"] = number
+    return item
+
+
+def incomplete(preferences, number=None):
+    item = recipe(preferences, number)
+    del item["ingredients"]
+    return item
+
+
+def numbered_requests(prompt):
+    return re.findall(r"^\s*(\d+)\. Preferences: (.*?) \|", prompt, re.MULTILINE)
+
+
+@pytest.fixture
+def use_model(monkeypatch):
+    monkeypatch.setattr(gemini_utils, "breaker", circuit_breaker.CircuitBreaker("gemini"))
+
+    def install(model):
+        monkeypatch.setattr(gemini_utils, "get_model", lambda: model)
+        return model
+    return install
+
+
+REQUESTS = [{"preferences": name} for name in ("a", "b", "c")]
+
+
+def test_items_matched_by_request_number_and_retried_renumbered(use_model):
+    model = use_model(ScriptedModel(
+        # Out of order, with request 2 incomplete
+        [recipe("c", 3), recipe("a", 1), incomplete("b", 2)],
+        # The retry has no request numbers, so position decides
+        [recipe("b")],
+    ))
+    results = gemini_utils.generate_recipes_batch(REQUESTS)
+
+    assert [result["title"] for result in results] == ["Stand-in a", "Stand-in b", "Stand-in c"]
+    assert numbered_requests(model.prompts[0]) == [("1", "a"), ("2", "b"), ("3", "c")]
+    assert numbered_requests(model.prompts[1]) == [("1", "b")]
+
+
+def test_error_only_for_items_that_failed_every_attempt(use_model):
+    model = use_model(ScriptedModel(
+        [recipe("a", 1), incomplete("b", 2), incomplete("c", 3)],
+        [recipe("b", 1), incomplete("c", 2)],
+    ))
+    results = gemini_utils.generate_recipes_batch(REQUESTS, max_retries=1)
+
+    assert results[0]["title"] == "Stand-in a"
+    assert results[1]["title"] == "Stand-in b"
+    assert results[2] == ERROR
+    assert len(model.prompts) == 2
+
+
+def test_unparseable_reply_uses_up_an_attempt(use_model):
+    model = use_model(ScriptedModel("not json", [recipe("a", 1), recipe("b", 2), recipe("c", 3)]))
+    results = gemini_utils.generate_recipes_batch(REQUESTS)
+
+    assert [result["title"] for result in results] == ["Stand-in a", "Stand-in b", "Stand-in c"]
+    assert len(model.prompts) == 2
+
+
+def test_stub_model_failures(use_model):
+    use_model(model_stub.StubModel(latency=0, failure_rate=1.0))
+    assert gemini_utils.generate_recipes_batch(REQUESTS, max_retries=2) == [ERROR] * 3
+
+    use_model(model_stub.StubModel(latency=0, failure_rate=0.0))
+    assert all("error" not in result for result in gemini_utils.generate_recipes_batch(REQUESTS))
+
+
+def test_batch_size_is_capped():
+    with pytest.raises(ValueError):
+        gemini_utils.generate_recipes_batch([{"preferences": "a"}] * (gemini_utils.MAX_BATCH_SIZE + 1))
@@ -0,0 +1,74 @@
+import pytest
+
+import circuit_breaker
+import gemini_utils
+import model_stub
+import recipe_store
+import storage
+
+
+def fail():
+    raise RuntimeError("503")
+
+
+def test_opens_after_consecutive_failures_and_recovers(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    breaker = circuit_breaker.CircuitBreaker("test", failure_threshold=2, reset_timeout=10)
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            breaker.call(fail)
+    assert breaker.state == circuit_breaker.OPEN
+    with pytest.raises(circuit_breaker.CircuitOpenError):
+        breaker.call(lambda: "ok")
+
+    now[0] = 10.0
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == circuit_breaker.CLOSED
+    assert breaker.metrics()["transitions"] == {"closed->open": 1, "open->half_open": 1, "half_open->closed": 1}
+
+
+def test_slow_calls_count_as_failures(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    breaker = circuit_breaker.CircuitBreaker("test", failure_threshold=1, latency_threshold=5)
+
+    def slow():
+        now[0] += 6
+        return "late"
+
+    assert breaker.call(slow) == "late"
+    assert breaker.state == circuit_breaker.OPEN
+    assert breaker.metrics()["slow_calls"] == 1
+
+
+@pytest.fixture
+def outage(monkeypatch, tmp_path):
+    """Stand-in model that always fails, a fresh breaker and an empty store"""
+    monkeypatch.setenv("GEMINI_BACKEND", "stub")
+    monkeypatch.setattr(model_stub, "DEFAULT_LATENCY", 0)
+    monkeypatch.setattr(model_stub, "DEFAULT_ERROR_RATE", 1)
+    monkeypatch.setattr(gemini_utils, "breaker", circuit_breaker.CircuitBreaker("gemini", failure_threshold=2))
+    monkeypatch.setattr(recipe_store, "_index_cache", {"loaded_at": None, "entries": []})
+    previous = storage._backend
+    storage.set_backend(storage.FileBackend(str(tmp_path / "data")))
+    recipe_store.put_recipe(model_stub.fake_recipe("spicy pasta"))
+    yield
+    storage.set_backend(previous)
+
+
+def test_stale_recipe_only_while_breaker_is_open(outage):
+    # Errors with the breaker closed are ordinary failures
+    for _ in range(2):
+        assert gemini_utils.generate_recipe("spicy pasta", [], 2) == \
+            {"error": "Failed to generate recipe. Please try again."}
+    assert gemini_utils.breaker.state == circuit_breaker.OPEN
+
+    recipe_data = gemini_utils.generate_recipe("spicy pasta", [], 2)
+    assert recipe_data["stale"] is True
+    assert recipe_data["title"] == "Stand-in spicy pasta"
+    assert gemini_utils.generate_recipe("sushi", [], 2) == {"error": gemini_utils.UNAVAILABLE_ERROR}
+
+    batch = gemini_utils.generate_recipes_batch([{"preferences": "spicy pasta"}])
+    assert batch[0]["stale"] is True
@@ -0,0 +1,72 @@
+import pytest
+
+import model_stub
+import models
+
+
+@pytest.fixture
+def recipe():
+    return models.Recipe.from_dict(model_stub.fake_recipe("spicy pasta", 2))
+
+
+def test_list_ops_use_original_indexes():
+    items = ("a", "b", "c", "d")
+    ops = [
+        {"op": "delete", "index": 0},
+        {"op": "replace", "index": 2, "value": "C"},
+        {"op": "insert", "index": 2, "value": "x"},
+        {"op": "insert", "index": 2, "value": "y"},
+        {"op": "delete", "index": 3},
+    ]
+    assert models._patch_list(items, ops) == ("b", "x", "y", "C")
+
+
+def test_insert_at_end():
+    assert models._patch_list(("a", "b"), [{"op": "insert", "index": 2, "value": "c"}]) == ("a", "b", "c")
+    assert models._patch_list((), [{"op": "insert", "index": 0, "value": "a"}]) == ("a",)
+
+
+@pytest.mark.parametrize("op", [
+    {"op": "insert", "index": 3, "value": "x"},
+    {"op": "replace", "index": 2, "value": "x"},
+    {"op": "delete", "index": -1},
+    {"op": "delete", "index": "first"},
+    {"op": "delete", "index": None},
+    {"op": "delete"},
+    {"op": "move", "index": 0},
+    "delete 0",
+])
+def test_bad_list_ops(op):
+    with pytest.raises(ValueError):
+        models._patch_list(("a", "b"), [op])
+
+
+def test_apply_patch(recipe):
+    patched = recipe.apply_patch({
+        "set": {"title": "Milder pasta", "servings": "4"},
+        "nutrition_info": {"calories": "600"},
+        "ingredients": [{"op": "insert", "index": len(recipe.ingredients), "value": "Basil"}],
+    })
+    assert patched.title == "Milder pasta"
+    assert patched.servings == "4"
+    assert patched.nutrition_info.calories == "600"
+    assert patched.nutrition_info.protein == recipe.nutrition_info.protein
+    assert patched.ingredients == recipe.ingredients + ("Basil",)
+    assert patched.instructions == recipe.instructions
+
+
+@pytest.mark.parametrize("patch", [
+    {"set": {"ingredients": "Basil"}},
+    {"set": {"rating": "5"}},
+    {"nutrition_info": {"sugar": "10g"}},
+    {"nutrition_info": ["600"]},
+    ["title"],
+])
+def test_bad_patches(recipe, patch):
+    with pytest.raises(ValueError):
+        recipe.apply_patch(patch)
+
+
+def test_compact_round_trip(recipe):
+    assert models.Recipe.from_compact(recipe.to_compact()) == recipe
+    assert models.Recipe.from_compact(recipe.to_compact()).to_dict() == recipe.to_dict()
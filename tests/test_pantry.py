@@ -0,0 +1,44 @@
+import pytest
+
+import pantry
+
+
+@pytest.mark.parametrize("text, expected", [
+    # Exact aliases after stripping quantities, units, descriptors and plurals
+    ("2 Chicken breasts", ["Chicken breast"]),
+    ("Garlic cloves", ["Garlic"]),
+    ("a pinch of salt", ["Salt"]),
+    ("minced beef", ["Ground beef"]),
+    ("bay leaves", ["Bay leaf"]),
+    ("Jalapeños", ["Chili pepper"]),
+    # Near-miss spellings
+    ("chiken", ["Chicken"]),
+    ("brocoli", ["Broccoli"]),
+    ("potatoe", ["Potato"]),
+    # Different ingredients that merely look alike keep the user's text
+    ("beans", ["beans"]),
+    ("wine", ["wine"]),
+    ("beer", ["beer"]),
+    ("oat milk", ["oat milk"]),
+    ("almond milk", ["almond milk"]),
+    ("peanut oil", ["peanut oil"]),
+    ("cherries", ["cherries"]),
+    ("lemongrass", ["lemongrass"]),
+    ("fish", ["fish"]),
+    ("leaves", ["leaves"]),
+    ("knives", ["knives"]),
+    # Several items on one line
+    ("salt and pepper", ["Salt", "pepper"]),
+    ("rice, beans & garlic", ["Rice", "beans", "Garlic"]),
+])
+def test_canonicalize(text, expected):
+    assert [match["name"] for match in pantry.canonicalize([text])] == expected
+
+
+def test_unknown_items_have_no_id():
+    assert pantry.canonicalize(["lemongrass"])[0]["id"] is None
+
+
+def test_equivalent_pantries_give_the_same_names():
+    assert pantry.canonical_names(["Onions", "2 tomatos", "chiken"]) == \
+        pantry.canonical_names(["chicken", "tomato", "1 onion", "onion"])
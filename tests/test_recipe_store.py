@@ -0,0 +1,94 @@
+import json
+import zlib
+
+import pytest
+
+import auth
+import model_stub
+import models
+import recipe_store
+import storage
+
+
+@pytest.fixture
+def legacy_data(tmp_path):
+    """A data/ tree whose history entries still embed the recipe body"""
+    data_dir = tmp_path / "data"
+    pasta = model_stub.fake_recipe("spicy pasta", 2)
+    curry = model_stub.fake_recipe("chicken curry", 4)
+    histories = {
+        "cook_at_example.com": [("spicy pasta", pasta), ("chicken curry", curry), ("pasta again", pasta)],
+        "chef_at_example.com": [("spicy pasta", pasta)],
+    }
+    for user_dir, entries in histories.items():
+        user_path = data_dir / "recipes" / user_dir
+        user_path.mkdir(parents=True)
+        for i, (prompt, recipe_data) in enumerate(entries):
+            entry = {"prompt": prompt, "recipe_data": recipe_data, "created_at": f"2024-01-0{i + 1}T12:00:00"}
+            (user_path / f"2024010{i + 1}_120000_000000.json").write_text(json.dumps(entry, indent=4))
+
+    previous = storage._backend
+    storage.set_backend(storage.FileBackend(str(data_dir)))
+    yield data_dir
+    storage.set_backend(previous)
+
+
+def history(email):
+    return [(entry["prompt"], entry["recipe"]) for entry in auth.get_user_recipes(email)]
+
+
+def test_compact(legacy_data):
+    before = {email: history(email) for email in ("cook@example.com", "chef@example.com")}
+    files_before = {path: path.read_bytes() for path in legacy_data.rglob("*.json")}
+
+    dry_run = recipe_store.compact(str(legacy_data), dry_run=True)
+    assert {path: path.read_bytes() for path in legacy_data.rglob("*.json")} == files_before
+    assert dry_run["entries_scanned"] == 4
+    assert dry_run["entries_converted"] == 4
+    assert dry_run["unique_recipes"] == 2
+    assert dry_run["bytes_saved"] > 0
+
+    assert recipe_store.compact(str(legacy_data)) == dry_run
+    for path in (legacy_data / "recipes").glob("*_at_*/*.json"):
+        assert "recipe_data" not in json.loads(path.read_text())
+
+    again = recipe_store.compact(str(legacy_data))
+    assert again["entries_scanned"] == 4
+    assert again["entries_converted"] == 0
+    assert again["unique_recipes"] == 0
+    assert again["bytes_saved"] == 0
+
+    assert {email: history(email) for email in before} == before
+
+
+def test_compact_layout_versions(tmp_path):
+    backend = storage.FileBackend(str(tmp_path / "data"))
+    pasta = model_stub.fake_recipe("spicy pasta", 2)
+    digest = recipe_store.put_recipe(pasta, backend)
+    recipe = recipe_store.load_recipe(digest, backend)
+    assert recipe.to_compact()[0] == models.COMPACT_VERSION
+
+    # Blobs written before the layout was versioned still load
+    unversioned = recipe.to_compact()[1:]
+    assert models.Recipe.from_compact(unversioned) == recipe
+
+    with pytest.raises(ValueError):
+        models.Recipe.from_compact([models.COMPACT_VERSION + 1, *unversioned])
+
+
+def test_unreadable_blob_hides_only_its_entry(tmp_path):
+    backend = storage.FileBackend(str(tmp_path / "data"))
+    previous = storage._backend
+    storage.set_backend(backend)
+    try:
+        auth.save_recipe("cook@example.com", "spicy pasta", model_stub.fake_recipe("spicy pasta", 2))
+        future = json.dumps([99, "From a newer release"]).encode("utf-8")
+        backend.set(recipe_store._blob_key("f" * 64), zlib.compress(future))
+        backend.rpush(recipe_store.history_name("cook@example.com"),
+                      recipe_store.make_entry("newer", "f" * 64, "2099-01-01T00:00:00"))
+        backend.rpush(recipe_store.history_name("cook@example.com"),
+                      recipe_store.make_entry("missing", "e" * 64, "2099-01-01T00:00:00"))
+
+        assert [entry["prompt"] for entry in auth.get_user_recipes("cook@example.com")] == ["spicy pasta"]
+    finally:
+        storage.set_backend(previous)
@@ -0,0 +1,27 @@
+import pytest
+
+import sessions
+
+
+@pytest.fixture(autouse=True)
+def secret(monkeypatch):
+    monkeypatch.setenv("SESSION_SECRET", "test-secret")
+    monkeypatch.setattr(sessions, "_secret", None)
+    sessions._cache.clear()
+    yield
+    sessions._cache.clear()
+
+
+@pytest.mark.parametrize("token", [
+    "", "no-dot", "a.b.c", "é.x", "abc.é", "bm90IGpzb24.x", None, 42,
+])
+def test_malformed_tokens_are_invalid(token):
+    assert sessions.validate(token) is None
+
+
+def test_tampered_token_is_invalid():
+    token = sessions.create_session("cook@example.com", "Cook")
+    payload, signature = token.split(".")
+    other = sessions.create_session("admin@example.com", "Admin").split(".")[0]
+    assert sessions.validate(f"{other}.{signature}") is None
+    assert sessions.validate(f"{payload}.{signature}") == {"email": "cook@example.com", "name": "Cook"}
@@ -0,0 +1,131 @@
+"""Every backend behaves the same when several workers share it.
+
+Each test opens two backend instances on the same store, the way two app
+workers would, and checks what the other worker sees.
+"""
+import threading
+from datetime import datetime
+
+import pytest
+
+import sessions
+import storage
+
+
+def _file(tmp_path):
+    return lambda: storage.FileBackend(str(tmp_path / "data"))
+
+
+def _sqlite(tmp_path):
+    return lambda: storage.SQLiteBackend(str(tmp_path / "state.db"))
+
+
+def _redis(tmp_path):
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    return lambda: storage.RedisBackend(client=fakeredis.FakeRedis(server=server))
+
+
+@pytest.fixture(params=[_file, _sqlite, _redis], ids=["file", "sqlite", "redis"])
+def open_backend(request, tmp_path):
+    """Factory returning a new backend instance (a new "worker") on one shared store"""
+    return request.param(tmp_path)
+
+
+def test_hsetnx_registration_race(open_backend):
+    winners = []
+    workers = [open_backend() for _ in range(8)]
+    barrier = threading.Barrier(len(workers))
+
+    def register(backend, number):
+        barrier.wait()
+        if backend.hsetnx("users", "cook@example.com", {"name": f"Cook {number}"}):
+            winners.append(number)
+
+    threads = [threading.Thread(target=register, args=(backend, i)) for i, backend in enumerate(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(winners) == 1
+    assert open_backend().hget("users", "cook@example.com") == {"name": f"Cook {winners[0]}"}
+
+
+def test_rpush_lrange_order(open_backend):
+    first, second = open_backend(), open_backend()
+    for i in range(12):
+        (first if i % 2 else second).rpush("recipes/cook_at_example.com", {"n": i})
+    assert open_backend().lrange("recipes/cook_at_example.com") == [{"n": i} for i in range(12)]
+    assert open_backend().lrange("recipes/nobody") == []
+
+
+class FrozenClock(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2024, 1, 1, 12, 0, 0)
+
+
+def test_concurrent_rpush_keeps_every_item(open_backend, monkeypatch):
+    # Every push lands in the same microsecond
+    monkeypatch.setattr(storage, "datetime", FrozenClock)
+    backend = open_backend()
+    threads = [
+        threading.Thread(target=lambda t=t: [backend.rpush("recipes/_index", {"t": t, "n": n}) for n in range(50)])
+        for t in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    items = open_backend().lrange("recipes/_index")
+    assert len(items) == 400
+    for t in range(8):
+        assert [item["n"] for item in items if item["t"] == t] == list(range(50))
+
+
+def test_setnx_blobs(open_backend):
+    first, second = open_backend(), open_backend()
+    assert first.get("recipes/_blobs/ab/abc.json.z") is None
+    assert first.setnx("recipes/_blobs/ab/abc.json.z", b"\x00first")
+    assert not second.setnx("recipes/_blobs/ab/abc.json.z", b"\x00second")
+    assert second.get("recipes/_blobs/ab/abc.json.z") == b"\x00first"
+
+
+def test_hash_roundtrip(open_backend):
+    first, second = open_backend(), open_backend()
+    first.hset("users", "a@example.com", {"name": "A"})
+    second.hset("users", "b@example.com", {"name": "B"})
+    first.hdel("users", "a@example.com")
+    assert open_backend().hgetall("users") == {"b@example.com": {"name": "B"}}
+
+
+@pytest.fixture
+def session_state(monkeypatch):
+    """Isolate sessions' module-level secret and cache"""
+    monkeypatch.delenv("SESSION_SECRET", raising=False)
+    monkeypatch.setattr(sessions, "_secret", None)
+    sessions._cache.clear()
+    previous = storage._backend
+    yield
+    sessions._cache.clear()
+    storage.set_backend(previous)
+
+
+def test_revocation_across_workers(open_backend, session_state):
+    storage.set_backend(open_backend())
+    token = sessions.create_session("cook@example.com", "Cook")
+
+    # Another worker: new backend instance, empty cache, secret read from the store
+    storage.set_backend(open_backend())
+    sessions._secret = None
+    assert sessions.validate(token) == {"email": "cook@example.com", "name": "Cook"}
+
+    storage.set_backend(open_backend())
+    sessions._cache.clear()
+    sessions.revoke(token)
+
+    storage.set_backend(open_backend())
+    sessions._cache.clear()
+    assert sessions.validate(token) is None